@@ -2,7 +2,7 @@ class AgentService:
     def __init__(self, agent):
         self.agent = agent
 
-    async def answer(self, query, context_text):
+    def _build_messages(self, query, context_text):
         tool_prompt = f"""
 You are a knowledge agent with access to MCP tools:
 1. SQLite MCP tool - query document metadata.
@@ -19,14 +19,30 @@ Workflow Rules:
 - Return only the final answer, do not show tool calls.
 """
 
-        messages = [
+        return [
             {"role": "system", "content": tool_prompt},
             {"role": "user", "content": query}
         ]
 
+    async def answer(self, query, context_text):
+        messages = self._build_messages(query, context_text)
+
         result = await self.agent.ainvoke({"input": messages})
 
         if isinstance(result, dict):
             return result.get("output", "I don't know")
 
         return str(result)
+
+    async def stream_answer(self, query, context_text):
+        """Yield the answer token by token as the LLM produces it."""
+        messages = self._build_messages(query, context_text)
+
+        async for event in self.agent.astream_events({"input": messages}, version="v2"):
+            if event["event"] != "on_chat_model_stream":
+                continue
+
+            # Tool-call turns stream empty content; only forward text.
+            chunk = event["data"]["chunk"]
+            if chunk.content:
+                yield chunk.content
@@ -0,0 +1,304 @@
+import os
+import asyncio
+import sqlite3
+from contextlib import asynccontextmanager
+from typing import List
+
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel
+
+from llm import LLMManager, get_scheduler
+from llm_scheduler import LLMBusyError
+from uploads import FileUpload
+from vectorstore import VectorStore
+
+from query_expander import QueryExpander
+from retriever import Retriever
+from context_builder import ContextBuilder
+from agent_service import AgentService
+from rag_pipeline import RAGPipeline
+
+from rebuilder import rebuild_vectorstore
+from upload_handler import aprocess_uploaded_files
+
+# ---------------- Config ----------------
+UPLOADS_DIR = os.getenv("UPLOADS_DIR", "uploads")
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+TOP_K_CHUNKS = 5
+
+# Requests allowed to run at once / wait for a slot before we answer 503.
+MAX_CONCURRENT_QUERIES = int(os.getenv("API_MAX_CONCURRENT_QUERIES", "8"))
+MAX_PENDING_QUERIES = int(os.getenv("API_MAX_PENDING_QUERIES", "32"))
+MAX_CONCURRENT_INGESTS = int(os.getenv("API_MAX_CONCURRENT_INGESTS", "1"))
+MAX_PENDING_INGESTS = int(os.getenv("API_MAX_PENDING_INGESTS", "4"))
+QUEUE_TIMEOUT = float(os.getenv("API_QUEUE_TIMEOUT", "30"))
+SHUTDOWN_GRACE = float(os.getenv("API_SHUTDOWN_GRACE", "30"))
+
+os.makedirs(UPLOADS_DIR, exist_ok=True)
+
+
+# ---------------- Backpressure ----------------
+class ConcurrencyLimiter:
+    """
+    Caps in-flight requests of one kind.
+    Callers beyond `max_concurrent` wait (up to QUEUE_TIMEOUT);
+    callers beyond `max_pending` waiting are rejected right away.
+    """
+
+    def __init__(self, max_concurrent: int, max_pending: int):
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.max_pending = max_pending
+        self.pending = 0
+        self.active = 0
+
+    async def acquire(self):
+        if self._semaphore.locked() and self.pending >= self.max_pending:
+            raise _busy()
+
+        self.pending += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise _busy()
+        finally:
+            self.pending -= 1
+
+        self.active += 1
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def _busy():
+    return HTTPException(
+        status_code=503,
+        detail="Server busy, retry later.",
+        headers={"Retry-After": "1"},
+    )
+
+
+# ---------------- Uploaded file adapter ----------------
+class UploadedBlob:
+    """
+    Gives an HTTP upload the shape the upload services expect (name, type,
+    read/seek) without reading the spooled body into memory.
+    """
+
+    def __init__(self, name: str, type: str, file):
+        self.name = name
+        self.type = type
+        self._file = file
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def seek(self, offset: int, whence: int = 0):
+        return self._file.seek(offset, whence)
+
+
+def _safe_filename(name) -> str:
+    """
+    Reduce a client-supplied upload name to a bare file name.
+    Names are joined onto UPLOADS_DIR, so path parts must not survive.
+    """
+    name = os.path.basename((name or "").replace("\\", "/"))
+    if name in ("", ".", ".."):
+        raise HTTPException(status_code=400, detail="Every uploaded file needs a valid filename.")
+    return name
+
+
+# ---------------- App state ----------------
+class AppState:
+    def __init__(self):
+        self.manager = None
+        self.vectorstore = None
+        self.upload_service = None
+        self.pipeline = None
+        self.processed = set()
+        self.query_limiter = ConcurrencyLimiter(MAX_CONCURRENT_QUERIES, MAX_PENDING_QUERIES)
+        self.ingest_limiter = ConcurrencyLimiter(MAX_CONCURRENT_INGESTS, MAX_PENDING_INGESTS)
+        self.shutting_down = False
+
+
+state = AppState()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # -------- Startup --------
+    state.manager = LLMManager()
+    await state.manager.initialize()
+    agent = state.manager.get_agent()
+
+    state.vectorstore = VectorStore()
+    state.upload_service = FileUpload(
+        upload_dir=UPLOADS_DIR,
+        db_path=os.path.join(UPLOADS_DIR, "database.db")
+    )
+
+    # Done once per process, not on every request like the Streamlit app.
+    await asyncio.to_thread(
+        rebuild_vectorstore,
+        state.upload_service,
+        state.vectorstore,
+        state.processed,
+        CHUNK_SIZE,
+        CHUNK_OVERLAP
+    )
+
+    state.pipeline = RAGPipeline(
+        QueryExpander(agent),
+        Retriever(state.vectorstore, TOP_K_CHUNKS),
+        ContextBuilder(),
+        AgentService(agent)
+    )
+
+    yield
+
+    # -------- Shutdown --------
+    state.shutting_down = True
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + SHUTDOWN_GRACE
+    while (state.query_limiter.active or state.ingest_limiter.active) and loop.time() < deadline:
+        await asyncio.sleep(0.1)
+
+    await state.manager.mcp_client.close()
+
+
+app = FastAPI(title="Talk To My Docs", lifespan=lifespan)
+
+
+def _check_accepting():
+    if state.shutting_down:
+        raise HTTPException(status_code=503, detail="Server shutting down.")
+
+
+# ---------------- Routes ----------------
+class QueryRequest(BaseModel):
+    query: str
+    stream: bool = False
+
+
+@app.post("/query")
+async def query(request: QueryRequest):
+    _check_accepting()
+
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty.")
+
+    if not request.stream:
+        async with state.query_limiter.slot():
+            try:
+                answer = await state.pipeline.run(request.query)
+            except LLMBusyError as e:
+                raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+        return {"query": request.query, "answer": answer}
+
+    # Hold the slot for as long as the client is reading the stream.
+    await state.query_limiter.acquire()
+    stream = state.pipeline.stream(request.query)
+
+    released = False
+
+    async def finish():
+        # Runs exactly once, whether the stream completed, failed,
+        # was abandoned by the client or never started at all.
+        nonlocal released
+        if released:
+            return
+        released = True
+        await stream.aclose()
+        state.query_limiter.release()
+
+    # Retrieval and the first LLM step happen before the response starts,
+    # so failures there can still become proper status codes.
+    try:
+        first = await anext(stream, None)
+    except LLMBusyError as e:
+        await finish()
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except BaseException:
+        await finish()
+        raise
+
+    async def token_stream():
+        try:
+            if first is not None:
+                yield first
+            async for token in stream:
+                yield token
+        finally:
+            await finish()
+
+    return StreamingResponse(
+        token_stream(),
+        media_type="text/plain; charset=utf-8",
+        background=BackgroundTask(finish)
+    )
+
+
+@app.post("/ingest")
+async def ingest(files: List[UploadFile] = File(...)):
+    _check_accepting()
+
+    # Client-supplied names are untrusted (unlike the Streamlit widget's).
+    blobs = [UploadedBlob(_safe_filename(f.filename), f.content_type, f.file) for f in files]
+
+    async with state.ingest_limiter.slot():
+        skipped = [b.name for b in blobs if b.name in state.processed]
+
+        await aprocess_uploaded_files(
+            state.upload_service,
+            state.vectorstore,
+            blobs,
+            state.processed,
+            CHUNK_SIZE,
+            CHUNK_OVERLAP
+        )
+
+    indexed = [b.name for b in blobs if b.name not in skipped]
+    return {"indexed": indexed, "skipped": skipped}
+
+
+@app.get("/stats")
+async def stats():
+    """LLM scheduler metrics: latency, queueing delay, retries, coalescing."""
+    return get_scheduler().stats()
+
+
+@app.get("/documents")
+async def documents():
+    def _list():
+        conn = sqlite3.connect(state.upload_service.db_path)
+        cur = conn.cursor()
+        cur.execute("SELECT filename, upload_date FROM documents ORDER BY upload_date DESC")
+        rows = cur.fetchall()
+        conn.close()
+        return rows
+
+    rows = await asyncio.to_thread(_list)
+    return [{"filename": filename, "upload_date": upload_date} for filename, upload_date in rows]
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        app,
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8000")),
+        timeout_graceful_shutdown=int(SHUTDOWN_GRACE),
+    )
@@ -5,17 +5,18 @@ import streamlit as st
 import sqlite3
 
 from llm import LLMManager
+from llm_scheduler import LLMBusyError
 from uploads import FileUpload
 from vectorstore import VectorStore
 
-from core.query_expander import QueryExpander
-from core.retriever import Retriever
-from core.context_builder import ContextBuilder
-from core.agent_service import AgentService
-from core.rag_pipeline import RAGPipeline
+from query_expander import QueryExpander
+from retriever import Retriever
+from context_builder import ContextBuilder
+from agent_service import AgentService
+from rag_pipeline import RAGPipeline
 
-from services.rebuilder import rebuild_vectorstore
-from services.upload_handler import process_uploaded_files
+from rebuilder import rebuild_vectorstore
+from ingest_jobs import IngestJobQueue, INDEXED, FAILED
 
 # ---------------- Config ----------------
 UPLOADS_DIR = r"D:\PythonProjects\modular_1 - Copy\uploads"
@@ -59,6 +60,36 @@ upload_service = st.session_state.upload_service
 if "uploaded_docs_processed" not in st.session_state:
     st.session_state.uploaded_docs_processed = set()
 
+# Submitted to the job queue and not finished yet / finished as failed.
+if "uploaded_docs_queued" not in st.session_state:
+    st.session_state.uploaded_docs_queued = set()
+
+if "uploaded_docs_failed" not in st.session_state:
+    st.session_state.uploaded_docs_failed = set()
+
+# ---------------- Ingestion Job Queue ----------------
+# One queue per server process: it outlives browser sessions, so a tab
+# reload doesn't lose in-flight uploads.
+@st.cache_resource
+def get_job_queue(_upload_service, _vectorstore):
+    return IngestJobQueue(
+        _upload_service,
+        _vectorstore,
+        CHUNK_SIZE,
+        CHUNK_OVERLAP
+    )
+
+job_queue = get_job_queue(upload_service, vectorstore)
+
+# Queued files stay in uploaded_docs_processed (so rebuild_vectorstore
+# leaves them to the queue) until they fail; failed ones can be retried.
+for filename, file_state in job_queue.file_states(st.session_state.uploaded_docs_queued).items():
+    if file_state in (INDEXED, FAILED):
+        st.session_state.uploaded_docs_queued.discard(filename)
+    if file_state == FAILED:
+        st.session_state.uploaded_docs_processed.discard(filename)
+        st.session_state.uploaded_docs_failed.add(filename)
+
 # ---------------- Rebuild Vectorstore ----------------
 rebuild_vectorstore(
     upload_service,
@@ -92,17 +123,57 @@ uploaded_files = st.sidebar.file_uploader(
     accept_multiple_files=True
 )
 
+def queue_files(files):
+    job_queue.submit(files)
+    # The job queue indexes these; keep rebuild_vectorstore off them.
+    names = {f.name for f in files}
+    st.session_state.uploaded_docs_processed.update(names)
+    st.session_state.uploaded_docs_queued.update(names)
+    st.session_state.uploaded_docs_failed.difference_update(names)
+
 if uploaded_files:
-    with st.spinner("Processing documents..."):
-        process_uploaded_files(
-            upload_service,
-            vectorstore,
-            uploaded_files,
-            st.session_state.uploaded_docs_processed,
-            CHUNK_SIZE,
-            CHUNK_OVERLAP
+    new_files = [
+        f for f in uploaded_files
+        if f.name not in st.session_state.uploaded_docs_processed
+        and f.name not in st.session_state.uploaded_docs_failed
+    ]
+    if new_files:
+        queue_files(new_files)
+        st.sidebar.success(f"✅ Queued {len(new_files)} document(s) for indexing")
+
+    failed_files = [f for f in uploaded_files if f.name in st.session_state.uploaded_docs_failed]
+    if failed_files:
+        st.sidebar.error(f"❌ {len(failed_files)} document(s) failed to index")
+        if st.sidebar.button("🔁 Retry failed documents"):
+            queue_files(failed_files)
+            st.sidebar.success(f"✅ Re-queued {len(failed_files)} document(s)")
+
+# ---------------- Sidebar: Ingestion Progress ----------------
+@st.fragment(run_every="2s")
+def show_ingestion_progress():
+    jobs = job_queue.progress()
+    if not jobs:
+        return
+
+    st.header("⏳ Ingestion Jobs")
+    for job in jobs:
+        label = (
+            f"Job {job['job_id']}: {job['indexed']}/{job['total']} files"
+            f" · {job['files_per_sec']:.2f} files/s"
+            f" · {job['chunks_per_sec']:.1f} chunks/s"
         )
-        st.success("✅ Document chunks added to vectorstore!")
+        if job["failed"]:
+            label += f" · {job['failed']} failed"
+        st.progress((job["indexed"] + job["failed"]) / job["total"], text=label)
+
+        if not job["done"]:
+            with st.expander("Files"):
+                for f in job["files"]:
+                    icon = "✅" if f["state"] == INDEXED else "❌" if f["state"] == FAILED else "🔄"
+                    st.markdown(f"{icon} **{f['filename']}** — {f['state']}")
+
+with st.sidebar:
+    show_ingestion_progress()
 
 # ---------------- Build RAG Pipeline ----------------
 expander = QueryExpander(agent)
@@ -125,9 +196,12 @@ if query and query.strip():
     if not rows and not uploaded_files:
         st.warning("Please upload documents first.")
     else:
-        with st.spinner("Thinking..."):
-            answer = asyncio.run(pipeline.run(query))
-        st.subheader("Answer")
-        st.markdown(answer)
+        try:
+            with st.spinner("Thinking..."):
+                answer = asyncio.run(pipeline.run(query))
+            st.subheader("Answer")
+            st.markdown(answer)
+        except LLMBusyError:
+            st.error("The language model is busy right now. Please try again in a moment.")
 else:
     st.info("Enter a question to chat with your documents.")
@@ -0,0 +1,295 @@
+"""
+Bulk directory indexer.
+
+Walks a directory tree, extracts text with FileLoader in a process pool,
+embeds chunks in large batches and writes them to the VectorStore and the
+metadata DB. Progress is checkpointed in the metadata DB after every batch,
+so an interrupted run picks up where it stopped.
+
+Usage:
+    python bulk_index.py /path/to/archive --db uploads/database.db
+"""
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from loaders import FileLoader
+from database import init_documents_table
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".csv", ".xlsx", ".txt")
+
+
+# ---------------- Checkpoint DB ----------------
+def init_db(db_path: str):
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+
+    init_documents_table(cur)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS bulk_index_checkpoint (
+            filepath TEXT PRIMARY KEY,
+            mtime REAL,
+            size INTEGER,
+            chunks INTEGER,
+            indexed_at TEXT
+        )
+    """)
+
+    conn.commit()
+    conn.close()
+
+
+def load_checkpoint(db_path: str) -> dict:
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+    cur.execute("SELECT filepath, mtime, size FROM bulk_index_checkpoint")
+    done = {filepath: (mtime, size) for filepath, mtime, size in cur.fetchall()}
+    conn.close()
+    return done
+
+
+# ---------------- Discovery ----------------
+def find_files(root: str, checkpoint: dict):
+    """Return (paths still to index, count already checkpointed) under `root`."""
+    todo, skipped = [], 0
+
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                continue
+
+            path = os.path.abspath(os.path.join(dirpath, name))
+            stat = os.stat(path)
+            if checkpoint.get(path) == (stat.st_mtime, stat.st_size):
+                skipped += 1
+                continue
+            todo.append(path)
+
+    return todo, skipped
+
+
+# ---------------- Extraction (runs in worker processes) ----------------
+def extract(path: str):
+    stat = os.stat(path)
+    with open(path, "rb") as f:
+        text = FileLoader().load(f, filename=path)
+    return path, stat.st_mtime, stat.st_size, text
+
+
+# ---------------- Progress ----------------
+class Progress:
+    def __init__(self, total: int):
+        self.total = total
+        self.docs = 0
+        self.chunks = 0
+        self.failed = 0
+        self.start = time.time()
+
+    def report(self, final: bool = False):
+        elapsed = max(time.time() - self.start, 1e-6)
+        docs_per_sec = self.docs / elapsed
+        chunks_per_sec = self.chunks / elapsed
+
+        remaining = self.total - self.docs - self.failed
+        eta = remaining / docs_per_sec if docs_per_sec else 0
+        eta_text = time.strftime("%H:%M:%S", time.gmtime(eta)) if docs_per_sec else "--:--:--"
+
+        line = (
+            f"\r{self.docs}/{self.total} docs"
+            f" | {docs_per_sec:.1f} docs/s"
+            f" | {chunks_per_sec:.1f} chunks/s"
+            f" | ETA {eta_text}"
+        )
+        if self.failed:
+            line += f" | {self.failed} failed"
+
+        sys.stdout.write(line + ("\n" if final else ""))
+        sys.stdout.flush()
+
+
+# ---------------- Indexer ----------------
+class BulkIndexer:
+    def __init__(self, vectorstore, db_path, chunk_size, chunk_overlap, batch_size, root="."):
+        self.vectorstore = vectorstore
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.root = os.path.abspath(root)
+
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap
+        )
+
+        self._chunks = []
+        self._ids = []
+        self._files = []
+
+    def add(self, path, mtime, size, text):
+        from vectorstore import chunk_id
+
+        # Relative to the indexed root: a large tree has many "report.txt".
+        filename = os.path.relpath(path, self.root).replace(os.sep, "/")
+        upload_date = datetime.now().isoformat()
+
+        doc_chunks = self.splitter.split_text(text) if text else []
+        for i, chunk in enumerate(doc_chunks):
+            self._chunks.append(
+                Document(
+                    page_content=chunk,
+                    metadata={
+                        "filename": filename,
+                        "chunk_index": i,
+                        "upload_date": upload_date
+                    }
+                )
+            )
+            # Stable ids: a batch re-run after a crash overwrites, never duplicates.
+            self._ids.append(chunk_id(path, i))
+
+        self._files.append((filename, path, mtime, size, len(doc_chunks), upload_date))
+
+    def should_flush(self) -> bool:
+        return len(self._chunks) >= self.batch_size
+
+    def _previous_chunk_ids(self, conn):
+        """Point ids of the last indexed version of the files in this batch."""
+        from vectorstore import chunk_id
+
+        paths = [path for _, path, _, _, _, _ in self._files]
+        rows = conn.execute(
+            f"SELECT filepath, chunks FROM bulk_index_checkpoint "
+            f"WHERE filepath IN ({', '.join('?' for _ in paths)})",
+            paths
+        ).fetchall()
+        return [chunk_id(path, i) for path, chunks in rows for i in range(chunks or 0)]
+
+    def flush(self):
+        """Embed + upsert the batch, then record it in one transaction."""
+        if not self._files:
+            return 0, 0
+
+        conn = sqlite3.connect(self.db_path)
+
+        # Changed files: drop every chunk of the old version first, so none
+        # outlive a shrink and new chunks aren't deduplicated against them.
+        self.vectorstore.delete_points(self._previous_chunk_ids(conn))
+        self.vectorstore.add_documents(self._chunks, ids=self._ids)
+
+        with conn:
+            conn.executemany(
+                "DELETE FROM documents WHERE filepath = ?",
+                [(path,) for _, path, _, _, _, _ in self._files]
+            )
+            conn.executemany(
+                "INSERT INTO documents (filename, filepath, upload_date) VALUES (?, ?, ?)",
+                [(filename, path, upload_date) for filename, path, _, _, chunks, upload_date in self._files if chunks]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO bulk_index_checkpoint (filepath, mtime, size, chunks, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(path, mtime, size, chunks, upload_date) for _, path, mtime, size, chunks, upload_date in self._files]
+            )
+        conn.close()
+
+        flushed = (len(self._files), len(self._chunks))
+        self._chunks, self._ids, self._files = [], [], []
+        return flushed
+
+
+def run(root, vectorstore, db_path, chunk_size, chunk_overlap, batch_size, workers):
+    init_db(db_path)
+    vectorstore.record_chunker(chunk_size, chunk_overlap)
+
+    todo, skipped = find_files(root, load_checkpoint(db_path))
+    print(f"📂 {len(todo)} files to index ({skipped} already indexed, skipped)")
+    if not todo:
+        return
+
+    indexer = BulkIndexer(vectorstore, db_path, chunk_size, chunk_overlap, batch_size, root=root)
+    progress = Progress(len(todo))
+
+    # Keep a bounded window of extractions in flight so extracted text
+    # doesn't pile up in memory while the embedder catches up.
+    window = workers * 4
+    paths = iter(todo)
+    pending = {}
+
+    # "spawn" keeps workers from inheriting the loaded embedding model.
+    ctx = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+
+    def fill():
+        while len(pending) < window:
+            path = next(paths, None)
+            if path is None:
+                return
+            pending[pool.submit(extract, path)] = path
+
+    try:
+        fill()
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                path = pending.pop(future)
+                try:
+                    indexer.add(*future.result())
+                except Exception as e:
+                    progress.failed += 1
+                    print(f"\n❌ Extraction failed for {path}:", e)
+
+            if indexer.should_flush():
+                docs, chunks = indexer.flush()
+                progress.docs += docs
+                progress.chunks += chunks
+                progress.report()
+
+            fill()
+
+        docs, chunks = indexer.flush()
+        progress.docs += docs
+        progress.chunks += chunks
+        progress.report(final=True)
+
+    except KeyboardInterrupt:
+        progress.report(final=True)
+        print("⏸️ Interrupted. Run the same command again to continue.")
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise SystemExit(130)
+
+    pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-index a directory tree into the vectorstore.")
+    parser.add_argument("root", help="Directory to index")
+    parser.add_argument("--db", default=os.path.join("uploads", "database.db"), help="Metadata SQLite DB")
+    parser.add_argument("--collection", default="docs", help="Qdrant collection name")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=2048, help="Chunks per embedding batch")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Extraction processes")
+    args = parser.parse_args()
+
+    # Imported here so the extraction workers don't pay for loading
+    # torch / sentence-transformers.
+    from vectorstore import VectorStore
+
+    run(
+        args.root,
+        VectorStore(collection_name=args.collection),
+        args.db,
+        args.chunk_size,
+        args.chunk_overlap,
+        args.batch_size,
+        args.workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
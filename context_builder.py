@@ -5,6 +5,9 @@ class ContextBuilder:
         for doc in relevant_docs:
             meta = doc.metadata
             context_text += f"Filename: {meta.get('filename', 'unknown')}\n"
+            # Near-identical text also found in these files (dedup "link" policy).
+            if meta.get("duplicate_sources"):
+                context_text += f"Also in: {', '.join(meta['duplicate_sources'])}\n"
             context_text += f"Content:\n{doc.page_content}\n\n"
 
         return context_text
\ No newline at end of file
@@ -5,17 +5,39 @@ DB_PATH = "documents.db"
 def get_connection():
     return sqlite3.connect(DB_PATH)
 
-def init_db():
-    conn = get_connection()
-    cur = conn.cursor()
+# ---------------- Shared documents schema ----------------
+# Every writer (uploads, ingest jobs, bulk indexer) uses this one table.
+DOCUMENT_COLUMNS = {
+    "filename": "TEXT",
+    "filepath": "TEXT",
+    "upload_date": "TEXT",
+    "content": "TEXT",
+    "metadata": "TEXT",
+}
 
-    cur.execute("""
+def init_documents_table(cur):
+    """Create the documents table, or bring an older one up to the shared schema."""
+    cur.execute(f"""
     CREATE TABLE IF NOT EXISTS documents (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
-        filename TEXT,
-        content TEXT
+        {", ".join(f"{name} {kind}" for name, kind in DOCUMENT_COLUMNS.items())}
     )
     """)
 
+    existing = {row[1] for row in cur.execute("PRAGMA table_info(documents)")}
+    for name, kind in DOCUMENT_COLUMNS.items():
+        if name not in existing:
+            cur.execute(f"ALTER TABLE documents ADD COLUMN {name} {kind}")
+
+    # Upload DBs used to store the file location in `path`.
+    if "path" in existing:
+        cur.execute("UPDATE documents SET filepath = path WHERE filepath IS NULL")
+
+def init_db():
+    conn = get_connection()
+    cur = conn.cursor()
+
+    init_documents_table(cur)
+
     conn.commit()
     conn.close()
@@ -0,0 +1,115 @@
+"""
+Near-duplicate detection with MinHash + LSH banding.
+
+Each chunk gets a MinHash signature over its word shingles; the signature
+is cut into bands and every band is hashed to a bucket key. Two chunks
+that share a bucket are candidates, and the fraction of equal signature
+values estimates their Jaccard similarity.
+"""
+import re
+import hashlib
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 8                    # 8 bands x 8 rows -> candidates from ~0.77 Jaccard
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5             # words per shingle
+
+# Payload fields VectorStore stores for ingest-time dedup.
+SIGNATURE_FIELD = "minhash"
+BANDS_FIELD = "lsh_bands"
+
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+
+_WORD = re.compile(r"\w+")
+
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    words = _WORD.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    )
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    hashes = _shingle_hashes(text)
+    # Universal hashing with 61-bit a, b; a*h + b wraps around in uint64
+    # on purpose (small coefficients would make every permutation order
+    # the shingles almost the same way).
+    with np.errstate(over="ignore"):
+        permuted = ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME) & _MAX_HASH
+    return permuted.min(axis=1)
+
+
+def lsh_bands(signature) -> list:
+    signature = np.asarray(signature, dtype=np.uint64)
+    return [
+        f"{band}:{hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).hexdigest()}"
+        for band in range(BANDS)
+    ]
+
+
+def similarity(sig_a, sig_b) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(np.asarray(sig_a, dtype=np.uint64) == np.asarray(sig_b, dtype=np.uint64)))
+
+
+class LSHIndex:
+    """In-memory band index for finding near-duplicate candidates."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._signatures = {}
+
+    def add(self, key, signature, bands=None):
+        self._signatures[key] = signature
+        for band in bands or lsh_bands(signature):
+            self._buckets.setdefault(band, []).append(key)
+
+    def remove(self, key):
+        # Bucket entries are left behind and skipped by best_match.
+        self._signatures.pop(key, None)
+
+    def best_match(self, signature, bands=None, exclude=None):
+        """(key, similarity) of the closest indexed entry, or (None, 0.0)."""
+        best_key, best_sim = None, 0.0
+        seen = set()
+
+        for band in bands or lsh_bands(signature):
+            for key in self._buckets.get(band, ()):
+                if key in seen or key == exclude or key not in self._signatures:
+                    continue
+                seen.add(key)
+
+                sim = similarity(signature, self._signatures[key])
+                if sim > best_sim:
+                    best_key, best_sim = key, sim
+
+        return best_key, best_sim
+
+
+def drop_near_duplicates(documents, threshold: float = 0.85):
+    """Keep the first of every group of near-identical documents (order preserved)."""
+    index = LSHIndex()
+    kept = []
+
+    for i, doc in enumerate(documents):
+        signature = minhash_signature(doc.page_content)
+        _, sim = index.best_match(signature)
+        if sim >= threshold:
+            continue
+        index.add(i, signature)
+        kept.append(doc)
+
+    return kept
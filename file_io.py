@@ -0,0 +1,42 @@
+import os
+import mmap
+import hashlib
+
+BLOCK_SIZE = 1024 * 1024  # 1 MiB
+
+
+def read_text_file(file_path: str) -> str:
+    """Decode a text file straight from a memory map (no intermediate bytes copy)."""
+    if os.path.getsize(file_path) == 0:
+        return ""
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return str(mm, "utf-8", "ignore")
+
+
+def save_stream(file, file_path: str, block_size: int = BLOCK_SIZE) -> tuple:
+    """
+    Write an uploaded file to disk in fixed-size blocks, hashing as we go.
+    Returns (sha256 hex digest, size in bytes).
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    tmp_path = file_path + ".part"
+
+    with open(tmp_path, "wb") as out:
+        if hasattr(file, "getbuffer"):
+            # Streamlit UploadedFile is a BytesIO: slice its buffer, no copies.
+            with file.getbuffer() as buffer:
+                for start in range(0, len(buffer), block_size):
+                    block = buffer[start:start + block_size]
+                    sha256.update(block)
+                    out.write(block)
+                    size += len(block)
+        else:
+            file.seek(0)
+            while block := file.read(block_size):
+                sha256.update(block)
+                out.write(block)
+                size += len(block)
+
+    os.replace(tmp_path, file_path)
+    return sha256.hexdigest(), size
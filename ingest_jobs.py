@@ -0,0 +1,304 @@
+import os
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from langchain_classic.schema import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from vectorstore import chunk_id
+from file_io import save_stream
+from database import init_documents_table
+
+# ---------------- File states ----------------
+QUEUED = "queued"
+EXTRACTING = "extracting"
+EMBEDDING = "embedding"
+INDEXED = "indexed"
+FAILED = "failed"
+
+IN_PROGRESS = (EXTRACTING, EMBEDDING)
+
+
+class IngestJobQueue:
+    """
+    Persistent background ingestion.
+
+    Every submitted file gets a row in SQLite and moves through
+    queued -> extracting -> embedding -> indexed (or failed).
+    A pool of worker threads picks up queued files; extraction runs in
+    parallel while embedding/indexing is serialized on one lock.
+    After a crash, files caught mid-way are re-queued and indexed files
+    are left alone, so no completed work is redone.
+    """
+
+    def __init__(self, upload_service, vectorstore, chunk_size, chunk_overlap, db_path=None, workers=2):
+        self.upload_service = upload_service
+        self.vectorstore = vectorstore
+        self.db_path = db_path or upload_service.db_path
+
+        vectorstore.record_chunker(chunk_size, chunk_overlap)
+
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap
+        )
+
+        self._index_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+        self._init_db()
+        self._resume()
+
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"ingest-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for t in self._workers:
+            t.start()
+
+    # ------------------------------------------------
+    # DB setup
+    # ------------------------------------------------
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_db(self):
+        conn = self._connect()
+        cur = conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+
+        # Indexed files are recorded in the shared documents table.
+        init_documents_table(cur)
+
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS ingest_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at REAL
+            )
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS ingest_job_files (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id INTEGER,
+                filename TEXT,
+                filepath TEXT,
+                state TEXT,
+                chunks INTEGER DEFAULT 0,
+                error TEXT,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_ingest_job_files_state ON ingest_job_files (state)")
+
+        conn.commit()
+        conn.close()
+
+    def _resume(self):
+        """Re-queue files that were interrupted by a crash or restart."""
+        conn = self._connect()
+        conn.execute(
+            f"UPDATE ingest_job_files SET state = ?, started_at = NULL "
+            f"WHERE state IN ({', '.join('?' for _ in IN_PROGRESS)})",
+            (QUEUED, *IN_PROGRESS)
+        )
+        conn.commit()
+        conn.close()
+
+    # ------------------------------------------------
+    # Submit
+    # ------------------------------------------------
+    def submit(self, uploaded_files) -> int:
+        """Save the files to the upload dir and queue them. Returns the job id."""
+        os.makedirs(self.upload_service.upload_dir, exist_ok=True)
+
+        saved = []
+        for file in uploaded_files:
+            file_path = os.path.join(self.upload_service.upload_dir, file.name)
+            save_stream(file, file_path)
+            saved.append((file.name, file_path))
+
+        conn = self._connect()
+        cur = conn.cursor()
+        cur.execute("INSERT INTO ingest_jobs (created_at) VALUES (?)", (time.time(),))
+        job_id = cur.lastrowid
+        cur.executemany(
+            "INSERT INTO ingest_job_files (job_id, filename, filepath, state) VALUES (?, ?, ?, ?)",
+            [(job_id, filename, file_path, QUEUED) for filename, file_path in saved]
+        )
+        conn.commit()
+        conn.close()
+
+        self._wakeup.set()
+        return job_id
+
+    # ------------------------------------------------
+    # Workers
+    # ------------------------------------------------
+    def _claim_next(self):
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            cur.execute(
+                "SELECT id, filename, filepath FROM ingest_job_files WHERE state = ? ORDER BY id LIMIT 1",
+                (QUEUED,)
+            )
+            row = cur.fetchone()
+            if row:
+                cur.execute(
+                    "UPDATE ingest_job_files SET state = ?, started_at = ? WHERE id = ?",
+                    (EXTRACTING, time.time(), row[0])
+                )
+            conn.commit()
+            return row
+        finally:
+            conn.close()
+
+    def _set_state(self, file_id, state, error=None):
+        conn = self._connect()
+        conn.execute(
+            "UPDATE ingest_job_files SET state = ?, error = ? WHERE id = ?",
+            (state, error, file_id)
+        )
+        conn.commit()
+        conn.close()
+
+    def _worker(self):
+        while not self._stopping.is_set():
+            row = self._claim_next()
+            if row is None:
+                self._wakeup.wait(timeout=1)
+                self._wakeup.clear()
+                continue
+
+            file_id, filename, file_path = row
+            try:
+                self._process(file_id, filename, file_path)
+            except Exception as e:
+                print(f"❌ Ingestion failed for {filename}:", e)
+                self._set_state(file_id, FAILED, error=str(e))
+
+    def _process(self, file_id, filename, file_path):
+        # -------- Extract + chunk --------
+        content = self.upload_service._extract_text(file_path)
+        doc_chunks = self.splitter.split_text(content)
+
+        upload_date = datetime.now().isoformat()
+        chunks = [
+            Document(
+                page_content=chunk,
+                metadata={
+                    "filename": filename,
+                    "chunk_index": i,
+                    "upload_date": upload_date
+                }
+            )
+            for i, chunk in enumerate(doc_chunks)
+        ]
+
+        # -------- Embed + index --------
+        self._set_state(file_id, EMBEDDING)
+        with self._index_lock:
+            # Stable ids: re-running an interrupted file overwrites its points.
+            self.vectorstore.add_documents(
+                chunks,
+                ids=[chunk_id(file_path, i) for i in range(len(chunks))]
+            )
+
+        # -------- Record as indexed --------
+        conn = self._connect()
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO documents (filename, filepath, upload_date) VALUES (?, ?, ?)",
+            (filename, file_path, upload_date)
+        )
+        cur.execute(
+            "UPDATE ingest_job_files SET state = ?, chunks = ?, error = NULL, finished_at = ? WHERE id = ?",
+            (INDEXED, len(chunks), time.time(), file_id)
+        )
+        conn.commit()
+        conn.close()
+
+    def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+        for t in self._workers:
+            t.join()
+
+    # ------------------------------------------------
+    # Progress
+    # ------------------------------------------------
+    def file_states(self, filenames) -> dict:
+        """Latest state of each of `filenames` (files never submitted are left out)."""
+        filenames = list(filenames)
+        if not filenames:
+            return {}
+
+        conn = self._connect()
+        cur = conn.cursor()
+        cur.execute(
+            f"SELECT filename, state FROM ingest_job_files WHERE id IN ("
+            f"SELECT MAX(id) FROM ingest_job_files "
+            f"WHERE filename IN ({', '.join('?' for _ in filenames)}) GROUP BY filename)",
+            filenames
+        )
+        states = dict(cur.fetchall())
+        conn.close()
+        return states
+
+    def progress(self, limit: int = 5) -> list:
+        """
+        Latest `limit` jobs, newest first, each with per-file states
+        and throughput (files/s, chunks/s) since the first file started.
+        """
+        conn = self._connect()
+        cur = conn.cursor()
+        cur.execute("SELECT id, created_at FROM ingest_jobs ORDER BY id DESC LIMIT ?", (limit,))
+        jobs = cur.fetchall()
+
+        result = []
+        for job_id, created_at in jobs:
+            cur.execute(
+                "SELECT filename, state, chunks, error, started_at, finished_at "
+                "FROM ingest_job_files WHERE job_id = ? ORDER BY id",
+                (job_id,)
+            )
+            files = [
+                {
+                    "filename": filename,
+                    "state": state,
+                    "chunks": chunks,
+                    "error": error,
+                    "started_at": started_at,
+                    "finished_at": finished_at,
+                }
+                for filename, state, chunks, error, started_at, finished_at in cur.fetchall()
+            ]
+
+            indexed = [f for f in files if f["state"] == INDEXED]
+            failed = [f for f in files if f["state"] == FAILED]
+            done = len(indexed) + len(failed)
+            total_chunks = sum(f["chunks"] for f in indexed)
+
+            started = [f["started_at"] for f in files if f["started_at"]]
+            finished = [f["finished_at"] for f in files if f["finished_at"]]
+            end = max(finished) if done == len(files) and finished else time.time()
+            elapsed = end - min(started) if started else 0.0
+
+            result.append({
+                "job_id": job_id,
+                "created_at": created_at,
+                "total": len(files),
+                "indexed": len(indexed),
+                "failed": len(failed),
+                "done": done == len(files),
+                "chunks": total_chunks,
+                "files_per_sec": len(indexed) / elapsed if elapsed else 0.0,
+                "chunks_per_sec": total_chunks / elapsed if elapsed else 0.0,
+                "files": files,
+            })
+
+        conn.close()
+        return result
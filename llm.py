@@ -3,6 +3,28 @@ from langchain_groq import ChatGroq
 from langchain_classic.agents import create_tool_calling_agent, AgentExecutor
 from langchain_core.prompts import ChatPromptTemplate
 from mcp_client import MCPClient
+from llm_scheduler import LLMScheduler, ScheduledAgent
+from scheduled_chat_model import ScheduledChatModel
+
+# ------------------------------
+# ✅ PROCESS-WIDE SCHEDULER
+# ------------------------------
+# Every session shares one Groq API key, so concurrency and
+# token-per-minute limits have to be enforced across all of them.
+_scheduler = None
+
+
+def get_scheduler() -> LLMScheduler:
+    global _scheduler
+
+    if _scheduler is None:
+        tpm = os.getenv("LLM_TOKENS_PER_MINUTE")
+        _scheduler = LLMScheduler(
+            max_concurrent=int(os.getenv("LLM_MAX_CONCURRENT", "4")),
+            tokens_per_minute=int(tpm) if tpm else None,
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "4")),
+        )
+    return _scheduler
 
 
 class LLMManager:
@@ -33,10 +55,14 @@ class LLMManager:
             if not api_key:
                 raise RuntimeError("GROQ_API_KEY not set!")
 
-            self.llm = ChatGroq(
-                model="meta-llama/llama-4-maverick-17b-128e-instruct",
-                temperature=0,
-                groq_api_key=api_key,
+            # Each Groq request (one per agent step) goes through the scheduler.
+            self.llm = ScheduledChatModel(
+                inner=ChatGroq(
+                    model="meta-llama/llama-4-maverick-17b-128e-instruct",
+                    temperature=0,
+                    groq_api_key=api_key,
+                ),
+                scheduler=get_scheduler(),
             )
 
         return self.llm
@@ -76,8 +102,9 @@ class LLMManager:
     # PUBLIC ACCESS
     # ---------------------------
     def get_agent(self):
+        """Agent with single-flight runs; its LLM requests go through the shared LLMScheduler."""
         if not self.agent_executor:
             raise RuntimeError(
                 "LLMManager not initialized. Call await initialize() first."
             )
-        return self.agent_executor
+        return ScheduledAgent(self.agent_executor, get_scheduler())
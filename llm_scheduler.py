@@ -0,0 +1,352 @@
+import json
+import time
+import heapq
+import random
+import asyncio
+import hashlib
+import itertools
+import threading
+import concurrent.futures
+from collections import deque
+
+# ---------------- Priorities (lower runs first) ----------------
+ANSWER = 0
+EXPANSION = 1
+
+# Run-config metadata key that carries the priority down to the chat model.
+PRIORITY_METADATA_KEY = "llm_priority"
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMBusyError(RuntimeError):
+    """The LLM kept failing with rate-limit / transient errors after all retries."""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status in RETRYABLE_STATUS:
+        return True
+
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+
+    # groq.RateLimitError / APIConnectionError / APITimeoutError
+    name = type(exc).__name__
+    return any(marker in name for marker in ("RateLimit", "APIConnection", "Timeout"))
+
+
+def estimate_tokens(inputs) -> int:
+    """Rough prompt size (~4 chars per token) for the per-minute budget."""
+    return len(json.dumps(inputs, default=str)) // 4 + 1
+
+
+# ---------------- Concurrency gate ----------------
+class PriorityGate:
+    """
+    At most `limit` holders at once; waiters are served by priority, then FIFO.
+    Thread-safe so one gate can be shared by every Streamlit session
+    (each runs its own event loop in its own thread).
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    async def acquire(self, priority: int):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self.active += 1
+                return
+            fut = loop.create_future()
+            heapq.heappush(self._waiters, (priority, next(self._seq), loop, fut))
+
+        try:
+            await fut
+        except asyncio.CancelledError:
+            # Slot was handed to us just as we got cancelled: pass it on.
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                _, _, loop, fut = heapq.heappop(self._waiters)
+                if fut.cancelled():
+                    continue
+                try:
+                    # Hand the slot over directly; `active` stays the same.
+                    loop.call_soon_threadsafe(self._grant, fut)
+                    return
+                except RuntimeError:
+                    continue  # waiter's loop is already closed
+            self.active -= 1
+
+    def _grant(self, fut):
+        if fut.cancelled():
+            self.release()
+        else:
+            fut.set_result(None)
+
+
+# ---------------- Token-per-minute budget ----------------
+class TokenBudget:
+    """Sliding window (60s by default) of estimated tokens. `None` disables the limit."""
+
+    def __init__(self, tokens_per_minute: int | None, window: float = 60.0):
+        self.tokens_per_minute = tokens_per_minute
+        self.window = window
+        self._window = deque()
+        self._used = 0
+        self._lock = threading.Lock()
+
+    async def reserve(self, tokens: int):
+        if not self.tokens_per_minute:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._window and self._window[0][0] <= now - self.window:
+                    self._used -= self._window.popleft()[1]
+
+                # An oversized request still goes through once the window is empty.
+                if not self._window or self._used + tokens <= self.tokens_per_minute:
+                    self._window.append((now, tokens))
+                    self._used += tokens
+                    return
+
+                wait = self._window[0][0] + self.window - now
+
+            await asyncio.sleep(wait)
+
+
+# ---------------- Scheduler ----------------
+class LLMScheduler:
+    """
+    Shared front door for every LLM request in the process:
+    - global concurrency limit with ANSWER calls ahead of EXPANSION calls
+    - token-per-minute budget
+    - retry with jittered exponential backoff on rate-limit / transient errors
+    - single-flight: identical in-flight agent runs share one result
+    - per-call latency and queueing delay
+
+    `call` / `stream` wrap a single model request (see ScheduledChatModel);
+    `coalesce` wraps a whole agent run (see ScheduledAgent).
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        tokens_per_minute: int | None = None,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        budget_window: float = 60.0,
+    ):
+        self.gate = PriorityGate(max_concurrent)
+        self.budget = TokenBudget(tokens_per_minute, window=budget_window)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.calls = deque(maxlen=1000)
+        self.coalesced = 0
+
+    # ---------------------------
+    # One model request
+    # ---------------------------
+    async def call(self, fn, tokens: int, priority: int = ANSWER):
+        """Await `fn()` under the gate and budget, retrying transient failures."""
+        queued_at = time.monotonic()
+
+        for attempt in range(self.max_retries + 1):
+            await self.budget.reserve(tokens)
+            await self.gate.acquire(priority)
+
+            started = time.monotonic()
+            try:
+                result = await fn()
+            except Exception as e:
+                if not is_retryable(e):
+                    self._record(priority, queued_at, started, attempt + 1, ok=False)
+                    raise
+                error = e
+            else:
+                self._record(priority, queued_at, started, attempt + 1, ok=True)
+                return result
+            finally:
+                # Don't hold a slot while backing off.
+                self.gate.release()
+
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt, error))
+
+        self._record(priority, queued_at, started, self.max_retries + 1, ok=False)
+        raise LLMBusyError(f"LLM unavailable after {self.max_retries + 1} attempts: {error!r}") from error
+
+    async def stream(self, stream_fn, tokens: int, priority: int = ANSWER, has_output=lambda item: True):
+        """
+        Iterate `stream_fn()` under the gate and budget.
+        Items for which `has_output` is false (e.g. empty role-only chunks)
+        are held back until real output arrives, so a failure before that
+        point can still be retried without the caller seeing a replay.
+        """
+        queued_at = time.monotonic()
+
+        for attempt in range(self.max_retries + 1):
+            await self.budget.reserve(tokens)
+            await self.gate.acquire(priority)
+
+            started = time.monotonic()
+            held = []
+            emitted = False
+            try:
+                async for item in stream_fn():
+                    if not emitted:
+                        if not has_output(item):
+                            held.append(item)
+                            continue
+                        emitted = True
+                        for early in held:
+                            yield early
+                        held = []
+                    yield item
+
+                for early in held:
+                    yield early
+            except Exception as e:
+                # Once output has reached the caller it can't be replayed.
+                if emitted or not is_retryable(e):
+                    self._record(priority, queued_at, started, attempt + 1, ok=False)
+                    raise
+                error = e
+            else:
+                self._record(priority, queued_at, started, attempt + 1, ok=True)
+                return
+            finally:
+                self.gate.release()
+
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt, error))
+
+        self._record(priority, queued_at, started, self.max_retries + 1, ok=False)
+        raise LLMBusyError(f"LLM unavailable after {self.max_retries + 1} attempts: {error!r}") from error
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        retry_after = headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_delay)
+            except ValueError:
+                pass
+
+        # Full jitter so retrying sessions don't stampede together.
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    # ---------------------------
+    # Single-flight
+    # ---------------------------
+    async def coalesce(self, key: str, fn):
+        """Run `fn()` once for all concurrent callers using the same `key`."""
+        with self._lock:
+            shared = self._inflight.get(key)
+            leader = shared is None
+            if leader:
+                shared = concurrent.futures.Future()
+                self._inflight[key] = shared
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            try:
+                # Shielded: a follower giving up must not cancel the shared result.
+                return await asyncio.shield(asyncio.wrap_future(shared))
+            except asyncio.CancelledError:
+                # The leader was cancelled, not us: make the call ourselves.
+                if shared.cancelled() and not asyncio.current_task().cancelling():
+                    return await self.coalesce(key, fn)
+                raise
+
+        try:
+            result = await fn()
+            if not shared.done():
+                shared.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            shared.cancel()
+            raise
+        except BaseException as e:
+            if not shared.done():
+                shared.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    # ---------------------------
+    # Metrics
+    # ---------------------------
+    def _record(self, priority, queued_at, started, attempts, ok):
+        self.calls.append({
+            "priority": priority,
+            "queue_delay": started - queued_at,
+            "latency": time.monotonic() - started,
+            "attempts": attempts,
+            "ok": ok,
+        })
+
+    def stats(self) -> dict:
+        calls = list(self.calls)
+        latencies = sorted(c["latency"] for c in calls)
+        delays = [c["queue_delay"] for c in calls]
+
+        def pct(values, p):
+            return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+        return {
+            "calls": len(calls),
+            "errors": sum(1 for c in calls if not c["ok"]),
+            "retries": sum(c["attempts"] - 1 for c in calls),
+            "coalesced": self.coalesced,
+            "active": self.gate.active,
+            "latency_p50": pct(latencies, 0.5),
+            "latency_p95": pct(latencies, 0.95),
+            "queue_delay_avg": sum(delays) / len(delays) if delays else 0.0,
+        }
+
+
+class ScheduledAgent:
+    """
+    Drop-in for AgentExecutor: coalesces identical runs and tags them with
+    a priority. The model requests inside the run (one per tool-loop step)
+    are gated and retried by ScheduledChatModel; tool calls are not.
+    """
+
+    def __init__(self, agent, scheduler: LLMScheduler):
+        self.agent = agent
+        self.scheduler = scheduler
+
+    @staticmethod
+    def _config(priority: int) -> dict:
+        return {"metadata": {PRIORITY_METADATA_KEY: priority}}
+
+    async def ainvoke(self, inputs, priority: int = ANSWER):
+        key = hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return await self.scheduler.coalesce(
+            key,
+            lambda: self.agent.ainvoke(inputs, config=self._config(priority))
+        )
+
+    def astream_events(self, inputs, priority: int = ANSWER, **kwargs):
+        return self.agent.astream_events(inputs, config=self._config(priority), **kwargs)
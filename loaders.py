@@ -1,10 +1,19 @@
 import os
+import mmap
 import pdfplumber
 import docx
 import fitz  # PyMuPDF
 import pandas as pd
 
 
+def _fileno(file):
+    """OS file descriptor for on-disk files, None for in-memory ones (BytesIO)."""
+    try:
+        return file.fileno()
+    except (AttributeError, OSError):
+        return None
+
+
 class FileLoader:
     def load(self, file, filename=None):
         """
@@ -40,6 +49,8 @@ class FileLoader:
                 return self._load_csv(file)
             elif ext == ".xlsx":
                 return self._load_xlsx(file)
+            elif ext == ".txt":
+                return self._load_txt(file)
 
         return ""
 
@@ -67,7 +78,11 @@ class FileLoader:
         try:
             file.seek(0)
             text = ""
-            doc = fitz.open(stream=file.read(), filetype="pdf")
+            if _fileno(file) is not None:
+                # On-disk file: let PyMuPDF read it instead of copying it into memory.
+                doc = fitz.open(file.name, filetype="pdf")
+            else:
+                doc = fitz.open(stream=file.read(), filetype="pdf")
             for page in doc:
                 text += page.get_text()
             return text
@@ -91,6 +106,17 @@ class FileLoader:
         except Exception:
             return ""
 
+    # ================= TXT =================
+    def _load_txt(self, file):
+        try:
+            fd = _fileno(file)
+            if fd is not None and os.fstat(fd).st_size:
+                with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                    return str(mm, "utf-8", "ignore")
+            return file.read().decode("utf-8", errors="ignore")
+        except Exception:
+            return ""
+
     # ================= XLSX =================
     def _load_xlsx(self, file):
         try:
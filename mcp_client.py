@@ -1,10 +1,10 @@
 import asyncio
 import atexit
 import os
+from datetime import datetime
 from typing import List
 from langchain_core.tools import BaseTool
 from langchain_mcp_adapters.client import MultiServerMCPClient
-from uploads import UPLOADS_DIR
 
 UPLOADS_DIR = r"D:\PythonProjects\modular_1\uploads"
 
@@ -39,6 +39,7 @@ class MCPClient:
     def __init__(self):
         self._client = MultiServerMCPClient(self.MCP_SERVERS)
         self.tools: List[BaseTool] | None = None
+        self._closed = False
 
         self._register_cleanup()
 
@@ -58,15 +59,42 @@ class MCPClient:
             raise RuntimeError("MCPClient not initialized. Call initialize() first.")
         return self.tools
 
-    def _register_cleanup(self):
-        async def cleanup():
-            await self._client.close()
+    async def close(self):
+        """Shut down the MCP server subprocesses (safe to call twice)."""
+        if self._closed:
+            return
+        self._closed = True
+        await self._client.close()
 
+    def _register_cleanup(self):
         def sync_cleanup():
+            if self._closed:
+                return
             try:
-                asyncio.run(cleanup())
+                asyncio.run(self.close())
             except RuntimeError:
                 pass
 
         atexit.register(sync_cleanup)
 
+
+# ---------------- Upload helpers ----------------
+async def upload_file_via_mcp(write_tool: BaseTool, filename: str, content: str):
+    """Write text content into the uploads folder through the Filesystem MCP."""
+    await write_tool.ainvoke({
+        "path": os.path.join(UPLOADS_DIR, filename),
+        "content": content,
+    })
+
+
+def _sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+async def save_metadata_via_mcp(sql_tool: BaseTool, filename: str, description: str):
+    """Record an upload note through the SQLite MCP (table created by uploads.init_db)."""
+    query = (
+        "INSERT INTO upload_notes (filename, description, created_at) VALUES ("
+        f"{_sql_literal(filename)}, {_sql_literal(description)}, {_sql_literal(datetime.now().isoformat())})"
+    )
+    await sql_tool.ainvoke({"query": query})
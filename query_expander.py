@@ -1,4 +1,5 @@
-import asyncio
+from llm_scheduler import EXPANSION
+
 
 class QueryExpander:
     def __init__(self, agent):
@@ -30,7 +31,7 @@ Original Question:
                     {"role": "system", "content": "You are a search query expansion assistant."},
                     {"role": "user", "content": expansion_prompt}
                 ]
-            })
+            }, priority=EXPANSION)
 
             if isinstance(expanded, dict):
                 expanded_queries = expanded.get("output", "").split("\n")
@@ -40,5 +41,7 @@ Original Question:
             expanded_queries = [q.strip() for q in expanded_queries if q.strip()]
             return [query] + expanded_queries
 
-        except:
+        except Exception as e:
+            # Expansion is best-effort: fall back to the original query.
+            print("⚠️ Query expansion failed:", e)
             return [query]
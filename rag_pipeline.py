@@ -1,3 +1,6 @@
+import asyncio
+
+
 class RAGPipeline:
     def __init__(self, expander, retriever, context_builder, agent_service):
         self.expander = expander
@@ -5,9 +8,18 @@ class RAGPipeline:
         self.context_builder = context_builder
         self.agent_service = agent_service
 
-    async def run(self, query: str):
+    async def _build_context(self, query: str):
         expanded_queries = await self.expander.expand(query)
-        docs = self.retriever.retrieve(expanded_queries)
-        context = self.context_builder.build(docs)
+        # Embedding + vector search is blocking; keep it off the event loop.
+        docs = await asyncio.to_thread(self.retriever.retrieve, expanded_queries)
+        return self.context_builder.build(docs)
+
+    async def run(self, query: str):
+        context = await self._build_context(query)
         answer = await self.agent_service.answer(query, context)
         return answer
+
+    async def stream(self, query: str):
+        context = await self._build_context(query)
+        async for token in self.agent_service.stream_answer(query, context):
+            yield token
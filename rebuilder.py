@@ -4,6 +4,13 @@ from langchain_classic.schema import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 def rebuild_vectorstore(upload_service, vectorstore, processed_set, chunk_size, chunk_overlap):
+    vectorstore.record_chunker(chunk_size, chunk_overlap)
+
+    # Fresh session: anything already in the index (e.g. restored from a
+    # snapshot) doesn't need to be extracted and embedded again.
+    if not processed_set:
+        processed_set.update(vectorstore.indexed_filenames())
+
     conn = sqlite3.connect(upload_service.db_path)
     cur = conn.cursor()
     cur.execute("SELECT filename, filepath FROM documents")
@@ -21,6 +28,11 @@ def rebuild_vectorstore(upload_service, vectorstore, processed_set, chunk_size,
         if filename in processed_set:
             continue
 
+        # Another worker (server mode) may have indexed it since we seeded.
+        if vectorstore.is_indexed(filename):
+            processed_set.add(filename)
+            continue
+
         content = upload_service._extract_text(filepath)
         doc_chunks = splitter.split_text(content)
 
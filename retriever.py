@@ -1,14 +1,96 @@
+import os
+from dedup import drop_near_duplicates
+
+# ---------------- Retrieval modes ----------------
+# fixed     -> always top_k hits (optionally above min_score)
+# threshold -> every hit above min_score, up to max_k
+# relative  -> hits within max_gap of the best hit, up to max_k
+# dynamic   -> start with min_k hits and keep adding while scores stay
+#              above min_score and don't drop by more than score_drop
+MODES = ("fixed", "threshold", "relative", "dynamic")
+
+
+def _env_float(name):
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+def _env_int(name):
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+# ---------------- Config (env) ----------------
+# Read once here; the apps just pass top_k.
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "fixed")
+RETRIEVAL_MIN_SCORE = _env_float("RETRIEVAL_MIN_SCORE")
+RETRIEVAL_MAX_K = _env_int("RETRIEVAL_MAX_K")
+RETRIEVAL_MAX_GAP = _env_float("RETRIEVAL_MAX_GAP") or 0.1
+RETRIEVAL_MIN_K = _env_int("RETRIEVAL_MIN_K") or 1
+RETRIEVAL_SCORE_DROP = _env_float("RETRIEVAL_SCORE_DROP") or 0.05
+
+
 class Retriever:
-    def __init__(self, vectorstore, top_k: int = 5):
+    def __init__(
+        self,
+        vectorstore,
+        top_k: int = 5,
+        near_duplicate_threshold: float = 0.85,
+        mode: str = None,
+        min_score: float = None,
+        max_k: int = None,
+        max_gap: float = None,
+        min_k: int = None,
+        score_drop: float = None,
+    ):
+        mode = mode or RETRIEVAL_MODE
+        min_score = min_score if min_score is not None else RETRIEVAL_MIN_SCORE
+
+        if mode not in MODES:
+            raise ValueError(f"Unknown retrieval mode: {mode!r} (expected one of {', '.join(MODES)})")
+        if mode == "threshold" and min_score is None:
+            raise ValueError("Retrieval mode 'threshold' needs min_score.")
+
         self.vectorstore = vectorstore
         self.top_k = top_k
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.mode = mode
+        self.min_score = min_score
+        self.max_k = max_k or RETRIEVAL_MAX_K or top_k
+        self.max_gap = max_gap if max_gap is not None else RETRIEVAL_MAX_GAP
+        self.min_k = min_k or RETRIEVAL_MIN_K
+        self.score_drop = score_drop if score_drop is not None else RETRIEVAL_SCORE_DROP
+
+    def _search(self, query):
+        k = self.top_k if self.mode == "fixed" else self.max_k
+        hits = self.vectorstore.similarity_search_with_score(query, k=k, score_threshold=self.min_score)
+
+        if not hits or self.mode in ("fixed", "threshold"):
+            return hits
+
+        if self.mode == "relative":
+            best = hits[0][1]
+            return [(doc, score) for doc, score in hits if best - score <= self.max_gap]
+
+        # dynamic
+        kept = hits[:self.min_k]
+        for doc, score in hits[self.min_k:]:
+            if kept[-1][1] - score > self.score_drop:
+                break
+            kept.append((doc, score))
+        return kept
 
     def retrieve(self, queries):
-        retrieved_docs = []
+        best = {}
 
         for q in queries:
-            docs = self.vectorstore.similarity_search(q, k=self.top_k)
-            retrieved_docs.extend(docs)
+            for doc, score in self._search(q):
+                seen = best.get(doc.page_content)
+                if seen is None or score > seen[1]:
+                    best[doc.page_content] = (doc, score)
+
+        # Strongest hits first, so they survive dedup and lead the prompt.
+        ranked = [doc for doc, _ in sorted(best.values(), key=lambda hit: hit[1], reverse=True)]
 
-        unique_docs = {doc.page_content: doc for doc in retrieved_docs}
-        return list(unique_docs.values())
+        # Near-identical chunks (revisions, overlapping exports) waste prompt space.
+        return drop_near_duplicates(ranked, self.near_duplicate_threshold)
@@ -0,0 +1,76 @@
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from llm_scheduler import ANSWER, PRIORITY_METADATA_KEY, estimate_tokens
+
+
+def _has_output(chunk: ChatGenerationChunk) -> bool:
+    message = chunk.message
+    return bool(message.content) or bool(getattr(message, "tool_call_chunks", None))
+
+
+class ScheduledChatModel(BaseChatModel):
+    """
+    Wraps a chat model so every request it makes goes through an
+    LLMScheduler (gate, token budget, retry). Inside an agent this means
+    each tool-loop step is scheduled on its own, with its full prompt.
+    The priority comes from the run's metadata (see ScheduledAgent).
+    """
+
+    inner: BaseChatModel
+    scheduler: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return f"scheduled-{self.inner._llm_type}"
+
+    def bind_tools(self, tools, **kwargs):
+        # Let the wrapped model format the tools, then bind them to us.
+        return self.bind(**self.inner.bind_tools(tools, **kwargs).kwargs)
+
+    @staticmethod
+    def _priority(run_manager) -> int:
+        metadata = getattr(run_manager, "metadata", None) or {}
+        return metadata.get(PRIORITY_METADATA_KEY, ANSWER)
+
+    @staticmethod
+    def _tokens(messages: List[BaseMessage], kwargs) -> int:
+        return estimate_tokens([messages, kwargs.get("tools")])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        # Sync path is unused by the app (everything is async) and unscheduled.
+        return self.inner._generate(messages, stop=stop, **kwargs)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        return self.inner._stream(messages, stop=stop, **kwargs)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return await self.scheduler.call(
+            lambda: self.inner._agenerate(messages, stop=stop, **kwargs),
+            tokens=self._tokens(messages, kwargs),
+            priority=self._priority(run_manager),
+        )
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async for chunk in self.scheduler.stream(
+            lambda: self.inner._astream(messages, stop=stop, **kwargs),
+            tokens=self._tokens(messages, kwargs),
+            priority=self._priority(run_manager),
+            has_output=_has_output,
+        ):
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
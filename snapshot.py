@@ -0,0 +1,276 @@
+"""
+Portable index snapshots.
+
+A snapshot is a directory with:
+    vectors.npy     float32 matrix (N x dim), memory-mapped on import
+    payloads.jsonl  one {"id", "payload"} line per row of vectors.npy
+    documents.jsonl the `documents` rows (the file list the apps show)
+    manifest.json   point count, embedding model identity, chunker settings
+
+The chunker settings come from the collection itself (recorded at ingest,
+see VectorStore.record_chunker) and travel with the imported collection.
+Importing bulk-loads the vectors into a new collection without running
+the embedding model, restores the documents rows, and refuses snapshots
+built with a different model or chunker settings.
+
+Usage:
+    python snapshot.py export snapshots/2026-10-19 --db uploads/database.db
+    python snapshot.py import snapshots/2026-10-19 --collection docs --db uploads/database.db
+"""
+import os
+import json
+import sqlite3
+import argparse
+from datetime import datetime
+import numpy as np
+from qdrant_client.models import VectorParams, Distance
+from database import init_documents_table
+from vectorstore import (
+    get_qdrant_client,
+    chunker_settings,
+    EMBEDDING_MODEL,
+    SPLITTER,
+    UPSERT_BATCH_SIZE,
+    UPSERT_PARALLEL,
+    UPSERT_MAX_RETRIES,
+    QDRANT_MODE,
+)
+
+FORMAT_VERSION = 2
+
+VECTORS_FILE = "vectors.npy"
+PAYLOADS_FILE = "payloads.jsonl"
+DOCUMENTS_FILE = "documents.jsonl"
+MANIFEST_FILE = "manifest.json"
+
+DOCUMENT_FIELDS = ("filename", "filepath", "upload_date", "metadata")
+
+
+# ---------------- Export ----------------
+def _export_documents(db_path, path):
+    rows = 0
+    with open(path, "w", encoding="utf-8") as f:
+        if not db_path or not os.path.exists(db_path):
+            return rows
+
+        conn = sqlite3.connect(db_path)
+        try:
+            init_documents_table(conn.cursor())
+            for row in conn.execute(f"SELECT {', '.join(DOCUMENT_FIELDS)} FROM documents ORDER BY id"):
+                f.write(json.dumps(dict(zip(DOCUMENT_FIELDS, row))) + "\n")
+                rows += 1
+        finally:
+            conn.close()
+
+    return rows
+
+
+def export_snapshot(client, collection_name, out_dir, db_path=None, chunk_size=None, chunk_overlap=None, batch_size=1024):
+    """
+    `chunk_size` / `chunk_overlap` are only used for collections indexed
+    before the chunker settings were recorded on them.
+    """
+    info = client.get_collection(collection_name)
+    params = info.config.params.vectors
+    count = client.count(collection_name, exact=True).count
+
+    chunker = chunker_settings(client, collection_name)
+    if chunker is None:
+        if chunk_size is None or chunk_overlap is None:
+            raise ValueError(
+                f"Collection {collection_name!r} has no recorded chunker settings; "
+                f"pass the chunk size and overlap it was indexed with."
+            )
+        chunker = {"splitter": SPLITTER, "chunk_size": chunk_size, "chunk_overlap": chunk_overlap}
+
+    os.makedirs(out_dir, exist_ok=False)
+
+    # Written straight to disk, never held in memory as a whole.
+    vectors = np.lib.format.open_memmap(
+        os.path.join(out_dir, VECTORS_FILE),
+        mode="w+",
+        dtype=np.float32,
+        shape=(count, params.size)
+    )
+
+    row = 0
+    offset = None
+    with open(os.path.join(out_dir, PAYLOADS_FILE), "w", encoding="utf-8") as f:
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            if row + len(points) > count:
+                raise RuntimeError("Collection changed during export, try again.")
+
+            for point in points:
+                vectors[row] = point.vector
+                # Ids keep their type: integer ids stay integers.
+                f.write(json.dumps({"id": point.id, "payload": point.payload}) + "\n")
+                row += 1
+
+            if offset is None:
+                break
+
+    if row != count:
+        raise RuntimeError("Collection changed during export, try again.")
+
+    vectors.flush()
+    del vectors
+
+    documents = _export_documents(db_path, os.path.join(out_dir, DOCUMENTS_FILE))
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created_at": datetime.now().isoformat(),
+        "source_collection": collection_name,
+        "count": count,
+        "embedding_model": EMBEDDING_MODEL,
+        "embedding_dim": params.size,
+        "distance": params.distance.value,
+        **chunker,
+        "documents": documents,
+    }
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+# ---------------- Import ----------------
+def load_manifest(snapshot_dir):
+    with open(os.path.join(snapshot_dir, MANIFEST_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_compatible(manifest, chunk_size=None, chunk_overlap=None, model_name=EMBEDDING_MODEL):
+    """
+    Raise ValueError if the snapshot was built with another model, or with
+    other chunker settings than the ones given (None skips that check).
+    """
+    expected = {
+        "format_version": FORMAT_VERSION,
+        "embedding_model": model_name,
+        "splitter": SPLITTER,
+    }
+    if chunk_size is not None:
+        expected["chunk_size"] = chunk_size
+    if chunk_overlap is not None:
+        expected["chunk_overlap"] = chunk_overlap
+
+    mismatches = [
+        f"{key}: snapshot has {manifest.get(key)!r}, expected {value!r}"
+        for key, value in expected.items()
+        if manifest.get(key) != value
+    ]
+    if mismatches:
+        raise ValueError("Snapshot is incompatible:\n  " + "\n  ".join(mismatches))
+
+
+def _iter_records(snapshot_dir, field, filename=PAYLOADS_FILE):
+    # Streamed so payloads never have to fit in memory all at once.
+    with open(os.path.join(snapshot_dir, filename), encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            yield record[field] if field else record
+
+
+def _import_documents(snapshot_dir, db_path):
+    """Restore the documents rows; rows for the same filepath are replaced."""
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            init_documents_table(conn.cursor())
+            for record in _iter_records(snapshot_dir, None, DOCUMENTS_FILE):
+                conn.execute("DELETE FROM documents WHERE filepath = ?", (record["filepath"],))
+                conn.execute(
+                    f"INSERT INTO documents ({', '.join(DOCUMENT_FIELDS)}) "
+                    f"VALUES ({', '.join('?' for _ in DOCUMENT_FIELDS)})",
+                    [record.get(field) for field in DOCUMENT_FIELDS]
+                )
+    finally:
+        conn.close()
+
+
+def _count_records(snapshot_dir):
+    with open(os.path.join(snapshot_dir, PAYLOADS_FILE), "rb") as f:
+        return sum(1 for _ in f)
+
+
+def import_snapshot(client, snapshot_dir, collection_name, db_path=None, chunk_size=None, chunk_overlap=None, parallel=1):
+    manifest = load_manifest(snapshot_dir)
+    check_compatible(manifest, chunk_size, chunk_overlap)
+
+    if client.collection_exists(collection_name):
+        raise ValueError(f"Collection {collection_name!r} already exists; import needs a new one.")
+
+    vectors = np.load(os.path.join(snapshot_dir, VECTORS_FILE), mmap_mode="r")
+    if vectors.shape != (manifest["count"], manifest["embedding_dim"]):
+        raise ValueError(f"{VECTORS_FILE} shape {vectors.shape} does not match the manifest.")
+
+    rows = _count_records(snapshot_dir)
+    if rows != manifest["count"]:
+        raise ValueError(f"{PAYLOADS_FILE} has {rows} rows, manifest says {manifest['count']}.")
+
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(
+            size=manifest["embedding_dim"],
+            distance=Distance(manifest["distance"])
+        ),
+        # Later ingestion into the replica is held to the same chunker.
+        metadata={key: manifest[key] for key in ("splitter", "chunk_size", "chunk_overlap")}
+    )
+
+    client.upload_collection(
+        collection_name=collection_name,
+        vectors=vectors,
+        payload=_iter_records(snapshot_dir, "payload"),
+        ids=_iter_records(snapshot_dir, "id"),
+        batch_size=UPSERT_BATCH_SIZE,
+        parallel=parallel,
+        max_retries=UPSERT_MAX_RETRIES,
+        wait=True,
+    )
+
+    if db_path:
+        _import_documents(snapshot_dir, db_path)
+
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export / import vectorstore snapshots.")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("snapshot_dir")
+    parser.add_argument("--collection", default="docs", help="Qdrant collection name")
+    parser.add_argument("--db", default=os.path.join("uploads", "database.db"), help="Metadata SQLite DB")
+    parser.add_argument(
+        "--chunk-size", type=int, default=None,
+        help="Export: only for collections without recorded settings. Import: required value, if given."
+    )
+    parser.add_argument("--chunk-overlap", type=int, default=None)
+    args = parser.parse_args()
+
+    client = get_qdrant_client()
+
+    if args.action == "export":
+        manifest = export_snapshot(
+            client, args.collection, args.snapshot_dir, args.db, args.chunk_size, args.chunk_overlap
+        )
+        print(f"✅ Exported {manifest['count']} points and {manifest['documents']} documents to {args.snapshot_dir}")
+    else:
+        # Parallel uploads only make sense against a Qdrant server.
+        parallel = UPSERT_PARALLEL if QDRANT_MODE == "server" else 1
+        manifest = import_snapshot(
+            client, args.snapshot_dir, args.collection, args.db, args.chunk_size, args.chunk_overlap, parallel=parallel
+        )
+        print(f"✅ Imported {manifest['count']} points and {manifest['documents']} documents into {args.collection!r}")
+
+
+if __name__ == "__main__":
+    main()
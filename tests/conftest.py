@@ -0,0 +1,34 @@
+import pytest
+
+
+@pytest.fixture
+def memory_store(monkeypatch):
+    """Factory for VectorStores on in-memory Qdrant with a tiny fake embedding model."""
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("qdrant_client")
+    pytest.importorskip("sentence_transformers")
+    import vectorstore
+
+    class FakeModel:
+        def __init__(self, name):
+            pass
+
+        def get_sentence_embedding_dimension(self):
+            return 4
+
+        def encode(self, texts, convert_to_numpy=True):
+            return np.array([[len(t) % 7 + 1.0, 1.0, 0.0, 0.0] for t in texts])
+
+    monkeypatch.setattr(vectorstore, "SentenceTransformer", FakeModel)
+
+    stores = []
+
+    def make(collection, **kwargs):
+        store = vectorstore.VectorStore(collection, mode="memory", **kwargs)
+        stores.append(store)
+        return store
+
+    yield make
+
+    for store in stores:
+        store.clear_collection()
@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("langchain_text_splitters")
+pytest.importorskip("pdfplumber")
+
+from bulk_index import run
+
+
+def _words(prefix, n):
+    return " ".join(f"{prefix}{i}" for i in range(n))
+
+
+def _index(tree, store, db_path):
+    run(str(tree), store, db_path, chunk_size=100, chunk_overlap=0, batch_size=1000, workers=1)
+
+
+def _documents(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT filename, filepath FROM documents ORDER BY filename").fetchall()
+    conn.close()
+    return rows
+
+
+def test_same_names_in_different_folders(tmp_path, memory_store):
+    tree = tmp_path / "tree"
+    (tree / "a").mkdir(parents=True)
+    (tree / "b").mkdir()
+    (tree / "a" / "report.txt").write_text(_words("alpha", 40))
+    (tree / "b" / "report.txt").write_text(_words("bravo", 40))
+
+    store = memory_store("bulk_names")
+    db_path = str(tmp_path / "db.sqlite")
+    _index(tree, store, db_path)
+
+    assert store.indexed_filenames() == {"a/report.txt", "b/report.txt"}
+    assert [filename for filename, _ in _documents(db_path)] == ["a/report.txt", "b/report.txt"]
+
+
+def test_reindexing_a_changed_file_replaces_it(tmp_path, memory_store):
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    report = tree / "report.txt"
+    report.write_text(_words("alpha", 120))
+    (tree / "other.txt").write_text(_words("bravo", 120))
+
+    store = memory_store("bulk_reindex")
+    db_path = str(tmp_path / "db.sqlite")
+    _index(tree, store, db_path)
+
+    before = store.client.count(store.collection_name).count
+    other = before // 2
+    assert other > 1
+
+    report.write_text("short now")
+    _index(tree, store, db_path)
+
+    assert store.client.count(store.collection_name).count == other + 1
+    points, _ = store.client.scroll(store.collection_name, limit=1000, with_payload=True)
+    report_text = [p.payload["content"] for p in points if p.payload["filename"] == "report.txt"]
+    assert report_text == ["short now"]
+    assert [filename for filename, _ in _documents(db_path)] == ["other.txt", "report.txt"]
@@ -0,0 +1,52 @@
+import sqlite3
+from database import DOCUMENT_COLUMNS, init_documents_table
+
+
+def _columns(conn):
+    return {row[1] for row in conn.execute("PRAGMA table_info(documents)")}
+
+
+def test_creates_shared_schema():
+    conn = sqlite3.connect(":memory:")
+    init_documents_table(conn.cursor())
+
+    assert _columns(conn) == {"id", *DOCUMENT_COLUMNS}
+
+
+def test_migrates_upload_schema_path_to_filepath():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE documents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            content TEXT,
+            filename TEXT,
+            path TEXT,
+            upload_date TEXT,
+            metadata TEXT
+        )
+    """)
+    conn.execute("INSERT INTO documents (filename, path) VALUES ('a.pdf', 'uploads/a.pdf')")
+
+    init_documents_table(conn.cursor())
+    # Running it again is a no-op.
+    init_documents_table(conn.cursor())
+
+    assert set(DOCUMENT_COLUMNS) <= _columns(conn)
+    assert conn.execute("SELECT filename, filepath FROM documents").fetchall() == [("a.pdf", "uploads/a.pdf")]
+
+
+def test_migrates_bulk_index_schema():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE documents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filename TEXT,
+            filepath TEXT,
+            upload_date TEXT
+        )
+    """)
+
+    init_documents_table(conn.cursor())
+    conn.execute("INSERT INTO documents (filename, filepath, content, metadata) VALUES ('a', 'b', 'c', '{}')")
+
+    assert set(DOCUMENT_COLUMNS) <= _columns(conn)
@@ -0,0 +1,132 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from dedup import BANDS, LSHIndex, drop_near_duplicates, lsh_bands, minhash_signature, similarity
+
+
+BASE = " ".join(f"word{i}" for i in range(200))
+NEAR = BASE.replace("word100", "changed")
+OTHER = " ".join(f"other{i}" for i in range(200))
+
+
+def test_signature_is_deterministic():
+    assert np.array_equal(minhash_signature(BASE), minhash_signature(BASE))
+    assert similarity(minhash_signature(BASE), minhash_signature(BASE)) == 1.0
+
+
+def test_similarity_tracks_jaccard():
+    assert similarity(minhash_signature(BASE), minhash_signature(NEAR)) > 0.85
+    assert similarity(minhash_signature(BASE), minhash_signature(OTHER)) < 0.1
+
+
+def test_bands():
+    bands = lsh_bands(minhash_signature(BASE))
+    assert len(bands) == BANDS
+    assert bands == lsh_bands(minhash_signature(BASE).tolist())
+
+
+def test_lsh_index_best_match():
+    index = LSHIndex()
+    index.add("base", minhash_signature(BASE))
+    index.add("other", minhash_signature(OTHER))
+
+    key, sim = index.best_match(minhash_signature(NEAR))
+    assert key == "base" and sim > 0.85
+
+    assert index.best_match(minhash_signature(BASE), exclude="base")[0] is None
+
+
+def test_lsh_index_remove():
+    index = LSHIndex()
+    index.add("base", minhash_signature(BASE))
+    index.remove("base")
+
+    assert index.best_match(minhash_signature(NEAR)) == (None, 0.0)
+
+
+def test_drop_near_duplicates_keeps_first():
+    class Doc:
+        def __init__(self, text):
+            self.page_content = text
+
+    docs = [Doc(BASE), Doc(NEAR), Doc(OTHER)]
+    assert drop_near_duplicates(docs) == [docs[0], docs[2]]
+
+
+# ---------------- VectorStore (in-memory Qdrant) ----------------
+@pytest.fixture
+def make_store(memory_store):
+    return lambda policy, collection: memory_store(collection, dedup_policy=policy)
+
+
+def _doc(text, filename):
+    from langchain_core.documents import Document
+    return Document(page_content=text, metadata={"filename": filename})
+
+
+def _count(store):
+    return store.client.count(store.collection_name).count
+
+
+def test_skip_drops_duplicates_of_stored_chunks(make_store):
+    store = make_store("skip", "dedup_skip")
+    store.add_documents([_doc(BASE, "a.txt")])
+    store.add_documents([_doc(NEAR, "b.txt"), _doc(OTHER, "b.txt")])
+
+    assert _count(store) == 2
+    assert store.indexed_filenames() == {"a.txt", "b.txt"}
+
+
+def test_link_records_duplicate_sources(make_store):
+    store = make_store("link", "dedup_link")
+    store.add_documents([_doc(BASE, "a.txt")])
+    # c.txt is entirely a duplicate: nothing of it is stored but the link.
+    store.add_documents([_doc(NEAR, "c.txt")])
+
+    assert _count(store) == 1
+    points, _ = store.client.scroll(store.collection_name, with_payload=True)
+    assert points[0].payload["duplicate_sources"] == ["c.txt"]
+    assert "c.txt" in store.indexed_filenames()
+
+
+def test_link_within_one_batch(make_store):
+    store = make_store("link", "dedup_batch")
+    store.add_documents([_doc(BASE, "a.txt"), _doc(NEAR, "b.txt")])
+
+    assert _count(store) == 1
+    points, _ = store.client.scroll(store.collection_name, with_payload=True)
+    assert points[0].payload["duplicate_sources"] == ["b.txt"]
+
+
+def test_readding_same_ids_overwrites(make_store):
+    import vectorstore
+
+    store = make_store("skip", "dedup_ids")
+    ids = [vectorstore.chunk_id("a.txt", 0)]
+    store.add_documents([_doc(BASE, "a.txt")], ids=ids)
+    store.add_documents([_doc(BASE, "a.txt")], ids=ids)
+
+    assert _count(store) == 1
+
+
+def test_link_skips_repeats_within_one_file(make_store):
+    store = make_store("link", "dedup_same_file")
+    store.add_documents([_doc(BASE, "a.txt"), _doc(NEAR, "a.txt")])
+    store.add_documents([_doc(NEAR, "a.txt")], ids=[123])
+
+    points, _ = store.client.scroll(store.collection_name, with_payload=True)
+    assert len(points) == 1
+    assert "duplicate_sources" not in points[0].payload
+
+
+def test_linked_sources_reach_the_context(make_store):
+    from context_builder import ContextBuilder
+
+    store = make_store("link", "dedup_context")
+    store.add_documents([_doc(BASE, "v1.txt")])
+    store.add_documents([_doc(NEAR, "v2.txt")])
+
+    [doc] = store.similarity_search(BASE, k=1)
+    context = ContextBuilder().build([doc])
+    assert "Filename: v1.txt\nAlso in: v2.txt\n" in context
@@ -0,0 +1,37 @@
+import io
+import hashlib
+from file_io import save_stream, read_text_file
+
+
+DATA = ("héllo wörld\n" * 50_000).encode("utf-8")
+
+
+def test_save_stream_from_bytesio(tmp_path):
+    target = tmp_path / "out.txt"
+    digest, size = save_stream(io.BytesIO(DATA), str(target), block_size=4096)
+
+    assert digest == hashlib.sha256(DATA).hexdigest()
+    assert size == len(DATA)
+    assert target.read_bytes() == DATA
+    assert not (tmp_path / "out.txt.part").exists()
+
+
+def test_save_stream_from_file_object(tmp_path):
+    source = tmp_path / "src.bin"
+    source.write_bytes(DATA)
+
+    with open(source, "rb") as f:
+        digest, size = save_stream(f, str(tmp_path / "out.bin"), block_size=4096)
+
+    assert digest == hashlib.sha256(DATA).hexdigest()
+    assert size == len(DATA)
+
+
+def test_read_text_file(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_bytes(DATA + b"\xff")
+    assert read_text_file(str(path)) == DATA.decode("utf-8")
+
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+    assert read_text_file(str(empty)) == ""
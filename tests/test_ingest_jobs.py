@@ -0,0 +1,73 @@
+import io
+import time
+
+import pytest
+
+pytest.importorskip("langchain_classic")
+pytest.importorskip("langchain_text_splitters")
+pytest.importorskip("numpy")
+
+from ingest_jobs import IngestJobQueue, FAILED, INDEXED
+
+
+class Upload(io.BytesIO):
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+
+
+class StubUploadService:
+    def __init__(self, upload_dir):
+        self.upload_dir = upload_dir
+
+    def _extract_text(self, filepath):
+        if filepath.endswith(".bad"):
+            raise ValueError("unreadable")
+        with open(filepath, encoding="utf-8") as f:
+            return f.read()
+
+
+class StubVectorStore:
+    def __init__(self):
+        self.added = []
+
+    def record_chunker(self, chunk_size, chunk_overlap):
+        pass
+
+    def add_documents(self, documents, ids=None):
+        self.added.extend(documents)
+
+
+def _wait_for(queue, names, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        states = queue.file_states(names)
+        if all(states.get(name) in (INDEXED, FAILED) for name in names):
+            return states
+        time.sleep(0.05)
+    raise AssertionError(f"files not finished: {states}")
+
+
+def test_file_states_track_latest_submission(tmp_path):
+    queue = IngestJobQueue(
+        StubUploadService(str(tmp_path / "uploads")),
+        StubVectorStore(),
+        chunk_size=100,
+        chunk_overlap=0,
+        db_path=str(tmp_path / "jobs.db"),
+        workers=1
+    )
+    try:
+        assert queue.file_states([]) == {}
+
+        queue.submit([Upload("ok.txt", b"hello world"), Upload("x.bad", b"???")])
+        states = _wait_for(queue, ["ok.txt", "x.bad"])
+        assert states == {"ok.txt": INDEXED, "x.bad": FAILED}
+        assert queue.file_states(["never.txt"]) == {}
+
+        # A failed file can be queued again; its latest state wins.
+        queue.submit([Upload("x.bad", b"???")])
+        assert queue.file_states(["x.bad"])["x.bad"] in ("queued", "extracting", FAILED)
+        assert _wait_for(queue, ["x.bad"]) == {"x.bad": FAILED}
+    finally:
+        queue.stop()
@@ -0,0 +1,236 @@
+import time
+import asyncio
+import pytest
+from llm_scheduler import (
+    LLMScheduler, LLMBusyError, PriorityGate, TokenBudget, ScheduledAgent,
+    ANSWER, EXPANSION, PRIORITY_METADATA_KEY,
+)
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class FakeAgent:
+    """Stands in for AgentExecutor: records calls, optionally slow."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = []
+
+    async def ainvoke(self, inputs, config=None):
+        self.calls.append((inputs, config))
+        await asyncio.sleep(self.delay)
+        return {"output": inputs["input"]}
+
+
+def fast_scheduler(**kwargs):
+    kwargs.setdefault("base_delay", 0.001)
+    kwargs.setdefault("max_delay", 0.01)
+    return LLMScheduler(**kwargs)
+
+
+# ---------------- Priority gate ----------------
+def test_gate_serves_answer_before_expansion():
+    async def main():
+        gate = PriorityGate(1)
+        order = []
+
+        async def worker(name, priority):
+            await gate.acquire(priority)
+            order.append(name)
+            await asyncio.sleep(0.01)
+            gate.release()
+
+        await gate.acquire(ANSWER)  # hold the only slot
+        tasks = [asyncio.create_task(worker("expansion", EXPANSION))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(worker("answer", ANSWER)))
+        await asyncio.sleep(0)
+        gate.release()
+        await asyncio.gather(*tasks)
+        return order, gate.active
+
+    order, active = asyncio.run(main())
+    assert order == ["answer", "expansion"]
+    assert active == 0
+
+
+def test_gate_cancelled_waiter_does_not_leak_slot():
+    async def main():
+        gate = PriorityGate(1)
+        await gate.acquire(ANSWER)
+        waiter = asyncio.create_task(gate.acquire(ANSWER))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        gate.release()
+        await asyncio.sleep(0.01)
+        return gate.active
+
+    assert asyncio.run(main()) == 0
+
+
+# ---------------- Token budget ----------------
+def test_token_budget_waits_for_window():
+    async def main():
+        budget = TokenBudget(100, window=0.2)
+        await budget.reserve(80)
+        start = time.monotonic()
+        await budget.reserve(50)
+        return time.monotonic() - start
+
+    assert asyncio.run(main()) >= 0.15
+
+
+def test_token_budget_disabled():
+    async def main():
+        budget = TokenBudget(None)
+        start = time.monotonic()
+        for _ in range(10):
+            await budget.reserve(10_000)
+        return time.monotonic() - start
+
+    assert asyncio.run(main()) < 0.05
+
+
+# ---------------- Retry / backoff ----------------
+def test_call_retries_transient_errors():
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimited()
+        return "ok"
+
+    scheduler = fast_scheduler(max_retries=4)
+    assert asyncio.run(scheduler.call(flaky, tokens=10)) == "ok"
+    assert len(attempts) == 3
+    assert scheduler.stats()["retries"] == 2
+
+
+def test_call_raises_busy_after_retries():
+    async def always_limited():
+        raise RateLimited()
+
+    scheduler = fast_scheduler(max_retries=2)
+    with pytest.raises(LLMBusyError):
+        asyncio.run(scheduler.call(always_limited, tokens=10))
+    assert scheduler.stats()["errors"] == 1
+
+
+def test_call_does_not_retry_other_errors():
+    attempts = []
+
+    async def broken():
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        asyncio.run(fast_scheduler().call(broken, tokens=10))
+    assert len(attempts) == 1
+
+
+def test_backoff_is_bounded_and_honours_retry_after():
+    scheduler = LLMScheduler(base_delay=1.0, max_delay=8.0)
+    for attempt in range(6):
+        assert 0 <= scheduler._backoff(attempt, RateLimited()) <= min(8.0, 2 ** attempt)
+
+    class Response:
+        headers = {"retry-after": "3"}
+
+    error = RateLimited()
+    error.response = Response()
+    assert scheduler._backoff(0, error) == 3.0
+
+
+def test_stream_retries_before_output():
+    attempts = []
+
+    async def stream():
+        attempts.append(1)
+        yield ""  # role-only chunk, no output yet
+        if len(attempts) < 2:
+            raise RateLimited()
+        yield "hello"
+        yield " world"
+
+    async def main():
+        return [
+            item async for item in fast_scheduler().stream(stream, tokens=10, has_output=bool)
+        ]
+
+    assert asyncio.run(main()) == ["", "hello", " world"]
+    assert len(attempts) == 2
+
+
+def test_stream_does_not_retry_after_output():
+    attempts = []
+
+    async def stream():
+        attempts.append(1)
+        yield "partial"
+        raise RateLimited()
+
+    async def main():
+        return [item async for item in fast_scheduler().stream(stream, tokens=10, has_output=bool)]
+
+    with pytest.raises(RateLimited):
+        asyncio.run(main())
+    assert len(attempts) == 1
+
+
+# ---------------- Single-flight ----------------
+def test_identical_runs_are_coalesced():
+    agent = FakeAgent()
+    scheduler = fast_scheduler()
+    scheduled = ScheduledAgent(agent, scheduler)
+
+    async def main():
+        return await asyncio.gather(*[scheduled.ainvoke({"input": "q"}) for _ in range(5)])
+
+    results = asyncio.run(main())
+    assert results == [{"output": "q"}] * 5
+    assert len(agent.calls) == 1
+    assert scheduler.coalesced == 4
+
+
+def test_priority_is_passed_in_run_metadata():
+    agent = FakeAgent(delay=0)
+    asyncio.run(ScheduledAgent(agent, fast_scheduler()).ainvoke({"input": "q"}, priority=EXPANSION))
+    _, config = agent.calls[0]
+    assert config["metadata"][PRIORITY_METADATA_KEY] == EXPANSION
+
+
+def test_cancelled_follower_does_not_break_leader():
+    agent = FakeAgent(delay=0.05)
+    scheduled = ScheduledAgent(agent, fast_scheduler())
+
+    async def main():
+        leader = asyncio.create_task(scheduled.ainvoke({"input": "q"}))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(scheduled.ainvoke({"input": "q"}))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(main()) == {"output": "q"}
+    assert len(agent.calls) == 1
+
+
+def test_follower_runs_itself_when_leader_cancelled():
+    agent = FakeAgent(delay=0.05)
+    scheduled = ScheduledAgent(agent, fast_scheduler())
+
+    async def main():
+        leader = asyncio.create_task(scheduled.ainvoke({"input": "q"}))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(scheduled.ainvoke({"input": "q"}))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == {"output": "q"}
+    assert len(agent.calls) == 2
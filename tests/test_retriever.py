@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from retriever import Retriever
+
+
+SCORES = [0.92, 0.90, 0.86, 0.70, 0.68, 0.40, 0.20]
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf"]
+
+
+class StubVectorStore:
+    """Returns the same ranked hits for every query, honouring k and score_threshold."""
+
+    def __init__(self, scores=SCORES):
+        self.hits = [
+            (SimpleNamespace(page_content=f"{word} " * 10 + str(i), metadata={}), score)
+            for i, (word, score) in enumerate(zip(WORDS, scores))
+        ]
+        self.calls = []
+
+    def similarity_search_with_score(self, query, k=5, score_threshold=None):
+        self.calls.append((query, k, score_threshold))
+        hits = [hit for hit in self.hits if score_threshold is None or hit[1] >= score_threshold]
+        return hits[:k]
+
+
+def _contents(docs):
+    return [doc.page_content.split()[0] for doc in docs]
+
+
+def test_fixed_returns_top_k():
+    store = StubVectorStore()
+    docs = Retriever(store, top_k=3, mode="fixed").retrieve(["q"])
+
+    assert _contents(docs) == ["alpha", "bravo", "charlie"]
+    assert store.calls == [("q", 3, None)]
+
+
+def test_threshold_keeps_hits_above_min_score():
+    store = StubVectorStore()
+    docs = Retriever(store, top_k=3, mode="threshold", min_score=0.5, max_k=10).retrieve(["q"])
+
+    assert _contents(docs) == ["alpha", "bravo", "charlie", "delta", "echo"]
+
+
+def test_threshold_needs_min_score():
+    with pytest.raises(ValueError):
+        Retriever(StubVectorStore(), mode="threshold")
+
+
+def test_relative_keeps_hits_near_the_best():
+    docs = Retriever(StubVectorStore(), top_k=3, mode="relative", max_k=10, max_gap=0.1).retrieve(["q"])
+
+    assert _contents(docs) == ["alpha", "bravo", "charlie"]
+
+
+def test_dynamic_stops_at_score_drop():
+    docs = Retriever(StubVectorStore(), top_k=3, mode="dynamic", max_k=10, min_k=1, score_drop=0.05).retrieve(["q"])
+
+    assert _contents(docs) == ["alpha", "bravo", "charlie"]
+
+
+def test_dynamic_keeps_min_k():
+    docs = Retriever(StubVectorStore(), top_k=3, mode="dynamic", max_k=10, min_k=5, score_drop=0.05).retrieve(["q"])
+
+    assert _contents(docs) == ["alpha", "bravo", "charlie", "delta", "echo"]
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        Retriever(StubVectorStore(), mode="nope")
+
+
+def test_merges_queries_by_best_score():
+    store = StubVectorStore()
+    docs = Retriever(store, top_k=2).retrieve(["a", "b"])
+
+    assert _contents(docs) == ["alpha", "bravo"]
+    assert len(store.calls) == 2
@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from llm_scheduler import LLMScheduler, EXPANSION, PRIORITY_METADATA_KEY
+from scheduled_chat_model import ScheduledChatModel
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class FlakyChatModel(FakeListChatModel):
+    """Fake chat model that hits a rate limit on its first request."""
+
+    failures: int = 1
+
+    async def _agenerate(self, *args, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise RateLimited()
+        return await super()._agenerate(*args, **kwargs)
+
+
+def make_model(inner):
+    scheduler = LLMScheduler(max_concurrent=1, base_delay=0.001, max_delay=0.01)
+    return ScheduledChatModel(inner=inner, scheduler=scheduler), scheduler
+
+
+def test_requests_go_through_scheduler():
+    model, scheduler = make_model(FakeListChatModel(responses=["hello"]))
+    assert asyncio.run(model.ainvoke("hi")).content == "hello"
+    assert scheduler.stats()["calls"] == 1
+
+
+def test_priority_comes_from_run_metadata():
+    model, scheduler = make_model(FakeListChatModel(responses=["hello"]))
+    asyncio.run(model.ainvoke("hi", config={"metadata": {PRIORITY_METADATA_KEY: EXPANSION}}))
+    assert scheduler.calls[-1]["priority"] == EXPANSION
+
+
+def test_rate_limited_request_is_retried():
+    model, scheduler = make_model(FlakyChatModel(responses=["hello"]))
+    assert asyncio.run(model.ainvoke("hi")).content == "hello"
+    assert scheduler.stats()["retries"] == 1
+
+
+def test_streaming_goes_through_scheduler():
+    model, scheduler = make_model(FakeListChatModel(responses=["hello"]))
+
+    async def main():
+        return "".join([chunk.content async for chunk in model.astream("hi")])
+
+    assert asyncio.run(main()) == "hello"
+    assert scheduler.stats()["calls"] == 1
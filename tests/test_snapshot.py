@@ -0,0 +1,99 @@
+import sqlite3
+
+import pytest
+
+
+def _doc(text, filename):
+    from langchain_core.documents import Document
+    return Document(page_content=text, metadata={"filename": filename})
+
+
+def _make_db(path):
+    from database import init_documents_table
+
+    conn = sqlite3.connect(path)
+    init_documents_table(conn.cursor())
+    conn.execute(
+        "INSERT INTO documents (filename, filepath, upload_date, metadata) VALUES (?, ?, ?, ?)",
+        ("a.txt", "/data/a.txt", "2026-10-19T00:00:00", '{"size": 3}')
+    )
+    conn.commit()
+    conn.close()
+
+
+def _rows(path):
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT filename, filepath, upload_date, metadata FROM documents").fetchall()
+    conn.close()
+    return rows
+
+
+@pytest.fixture
+def source(memory_store, tmp_path):
+    from qdrant_client.models import PointStruct
+
+    store = memory_store("snapshot_source", dedup_policy="off")
+    store.record_chunker(500, 50)
+    store.add_documents([_doc("some text about apples", "a.txt")])
+    # Integer ids must survive the round trip as integers.
+    store.client.upsert(store.collection_name, [PointStruct(id=7, vector=[1.0, 0.0, 0.0, 0.0], payload={"content": "x"})])
+
+    db_path = str(tmp_path / "source.db")
+    _make_db(db_path)
+    return store, db_path
+
+
+def test_round_trip(source, tmp_path):
+    from snapshot import export_snapshot, import_snapshot
+    from vectorstore import chunker_settings
+
+    store, db_path = source
+    out = str(tmp_path / "snap")
+
+    manifest = export_snapshot(store.client, store.collection_name, out, db_path)
+    assert (manifest["chunk_size"], manifest["chunk_overlap"], manifest["documents"]) == (500, 50, 1)
+
+    replica_db = str(tmp_path / "replica.db")
+    import_snapshot(store.client, out, "snapshot_replica", replica_db)
+    try:
+        assert store.client.count("snapshot_replica").count == 2
+        assert store.client.retrieve("snapshot_replica", [7])[0].id == 7
+        assert chunker_settings(store.client, "snapshot_replica")["chunk_size"] == 500
+        assert _rows(replica_db) == _rows(db_path)
+    finally:
+        store.client.delete_collection("snapshot_replica")
+
+
+def test_import_refuses_other_chunker(source, tmp_path):
+    from snapshot import export_snapshot, import_snapshot
+
+    store, db_path = source
+    out = str(tmp_path / "snap")
+    export_snapshot(store.client, store.collection_name, out, db_path)
+
+    with pytest.raises(ValueError):
+        import_snapshot(store.client, out, "snapshot_other", chunk_size=1000, chunk_overlap=100)
+    assert not store.client.collection_exists("snapshot_other")
+
+
+def test_record_chunker_refuses_mixing(memory_store):
+    store = memory_store("chunker_mix", dedup_policy="off")
+    store.record_chunker(1000, 100)
+
+    other = memory_store("chunker_mix", dedup_policy="off")
+    other.record_chunker(1000, 100)
+
+    with pytest.raises(ValueError):
+        memory_store("chunker_mix", dedup_policy="off").record_chunker(800, 100)
+
+
+def test_export_needs_settings_for_unrecorded_collections(memory_store, tmp_path):
+    from snapshot import export_snapshot
+
+    store = memory_store("snapshot_unrecorded", dedup_policy="off")
+
+    with pytest.raises(ValueError):
+        export_snapshot(store.client, store.collection_name, str(tmp_path / "a"))
+
+    manifest = export_snapshot(store.client, store.collection_name, str(tmp_path / "b"), chunk_size=1000, chunk_overlap=100)
+    assert manifest["documents"] == 0
@@ -0,0 +1,142 @@
+import pytest
+
+
+def _doc(text, filename):
+    from langchain_core.documents import Document
+    return Document(page_content=text, metadata={"filename": filename})
+
+
+def test_indexed_filenames_scrolls_once(memory_store, monkeypatch):
+    store = memory_store("filenames_cache", dedup_policy="off")
+    store.add_documents([_doc("first file", "a.txt")])
+
+    assert store.indexed_filenames() == {"a.txt"}
+
+    def no_scroll(*args, **kwargs):
+        raise AssertionError("indexed_filenames scrolled again")
+
+    monkeypatch.setattr(store.client, "scroll", no_scroll)
+
+    # New files are added to the cached set, and callers get a copy.
+    store.add_documents([_doc("second file", "b.txt")])
+    seen = store.indexed_filenames()
+    seen.add("mutated.txt")
+    assert store.indexed_filenames() == {"a.txt", "b.txt"}
+
+
+# ---------------- Backends ----------------
+def test_client_shared_per_backend(tmp_path, monkeypatch):
+    pytest.importorskip("qdrant_client")
+    pytest.importorskip("sentence_transformers")
+    import vectorstore
+
+    monkeypatch.setattr(vectorstore, "_qdrant_clients", {})
+
+    memory = vectorstore.get_qdrant_client("memory")
+    assert vectorstore.get_qdrant_client("memory") is memory
+
+    embedded = vectorstore.get_qdrant_client("embedded", path=str(tmp_path / "a"))
+    assert vectorstore.get_qdrant_client("embedded", path=str(tmp_path / "a")) is embedded
+    assert vectorstore.get_qdrant_client("embedded", path=str(tmp_path / "b")) is not embedded
+    assert embedded is not memory
+
+    for client in vectorstore._qdrant_clients.values():
+        client.close()
+
+
+def test_unknown_backend():
+    pytest.importorskip("qdrant_client")
+    pytest.importorskip("sentence_transformers")
+    import vectorstore
+
+    with pytest.raises(ValueError):
+        vectorstore.get_qdrant_client("cloud")
+
+
+def test_stores_share_the_memory_client(memory_store):
+    first = memory_store("backend_a")
+    second = memory_store("backend_b")
+
+    assert first.client is second.client
+    assert first.client.collection_exists("backend_a")
+    assert first.client.collection_exists("backend_b")
+
+
+def _upload_kwargs(store, monkeypatch, n):
+    from qdrant_client.models import PointStruct
+
+    calls = []
+    monkeypatch.setattr(store.client, "upload_points", lambda **kwargs: calls.append(kwargs))
+    store._upload([PointStruct(id=i, vector=[1.0, 0.0, 0.0, 0.0]) for i in range(n)])
+    return calls[0]
+
+
+def test_upload_parallel_only_for_large_server_batches(memory_store, monkeypatch):
+    import vectorstore
+
+    store = memory_store("upload_parallel")
+    big = vectorstore.UPSERT_BATCH_SIZE + 1
+
+    assert _upload_kwargs(store, monkeypatch, big)["parallel"] == 1
+
+    store.mode = "server"
+    assert _upload_kwargs(store, monkeypatch, vectorstore.UPSERT_BATCH_SIZE)["parallel"] == 1
+    assert _upload_kwargs(store, monkeypatch, big)["parallel"] == vectorstore.UPSERT_PARALLEL
+
+
+def test_concurrent_collection_create(memory_store, monkeypatch):
+    store = memory_store("create_race")
+
+    def lose_race(**kwargs):
+        raise ValueError("Collection create_race already exists")
+
+    monkeypatch.setattr(store.client, "collection_exists", lambda name: False)
+    monkeypatch.setattr(store.client, "create_collection", lose_race)
+
+    # Still missing after the failed create -> the error is real.
+    with pytest.raises(ValueError):
+        store._recreate_collection_once()
+
+    answers = iter([False, True])
+    monkeypatch.setattr(store.client, "collection_exists", lambda name: next(answers))
+    store._recreate_collection_once()
+
+
+def test_is_indexed_sees_other_workers_in_server_mode(memory_store, tmp_path):
+    pytest.importorskip("langchain_classic")
+    import sqlite3
+    from qdrant_client.models import PointStruct
+    from rebuilder import rebuild_vectorstore
+
+    store = memory_store("other_workers", dedup_policy="off")
+    store.add_documents([_doc("first file", "a.txt")])
+    assert store.indexed_filenames() == {"a.txt"}
+
+    # Another worker indexes b.txt behind this process's back.
+    store.client.upsert(store.collection_name, [
+        PointStruct(id=1, vector=[1.0, 0.0, 0.0, 0.0], payload={"content": "x", "filename": "b.txt"}),
+        PointStruct(id=2, vector=[1.0, 0.0, 0.0, 0.0], payload={"content": "y", "duplicate_sources": ["c.txt"]}),
+    ])
+    assert not store.is_indexed("b.txt")
+
+    store.mode = "server"
+    assert store.is_indexed("b.txt")
+    assert store.is_indexed("c.txt")
+    assert not store.is_indexed("d.txt")
+    assert "b.txt" in store.indexed_filenames()
+
+    db_path = str(tmp_path / "db.sqlite")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE documents (filename TEXT, filepath TEXT)")
+    conn.executemany("INSERT INTO documents VALUES (?, ?)", [("a.txt", "a"), ("b.txt", "b"), ("c.txt", "c")])
+    conn.commit()
+    conn.close()
+
+    class UploadService:
+        def _extract_text(self, filepath):
+            raise AssertionError(f"re-extracted {filepath}")
+
+    UploadService.db_path = db_path
+    processed = {"a.txt"}
+    rebuild_vectorstore(UploadService(), store, processed, 1000, 100)
+    assert processed == {"a.txt", "b.txt", "c.txt"}
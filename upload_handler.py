@@ -1,24 +1,19 @@
+import asyncio
 from datetime import datetime
 from langchain_classic.schema import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-def process_uploaded_files(upload_service, vectorstore, uploaded_files, processed_set, chunk_size, chunk_overlap):
-
+def _chunk_uploaded_docs(uploaded_docs, processed_set, chunk_size, chunk_overlap):
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap
     )
 
-    new_files = [f for f in uploaded_files if f.name not in processed_set]
-
-    if not new_files:
-        return
-
-    uploaded_docs = upload_service.upload_files(new_files)
     chunks_to_add = []
 
     for doc in uploaded_docs:
-        doc_chunks = splitter.split_text(doc["content"])
+        # Drop the text as soon as it is chunked.
+        doc_chunks = splitter.split_text(doc.pop("content"))
 
         for i, chunk in enumerate(doc_chunks):
             chunks_to_add.append(
@@ -34,4 +29,33 @@ def process_uploaded_files(upload_service, vectorstore, uploaded_files, processe
 
         processed_set.add(doc["filename"])
 
+    return chunks_to_add
+
+def process_uploaded_files(upload_service, vectorstore, uploaded_files, processed_set, chunk_size, chunk_overlap):
+
+    new_files = [f for f in uploaded_files if f.name not in processed_set]
+
+    if not new_files:
+        return
+
+    vectorstore.record_chunker(chunk_size, chunk_overlap)
+
+    uploaded_docs = upload_service.upload_files(new_files)
+    chunks_to_add = _chunk_uploaded_docs(uploaded_docs, processed_set, chunk_size, chunk_overlap)
+
     vectorstore.add_documents(chunks_to_add)
+
+async def aprocess_uploaded_files(upload_service, vectorstore, uploaded_files, processed_set, chunk_size, chunk_overlap):
+    """Async variant for the HTTP API: uploads on the running loop, embeds in a worker thread."""
+
+    new_files = [f for f in uploaded_files if f.name not in processed_set]
+
+    if not new_files:
+        return
+
+    vectorstore.record_chunker(chunk_size, chunk_overlap)
+
+    uploaded_docs = await upload_service.aupload_files(new_files)
+    chunks_to_add = _chunk_uploaded_docs(uploaded_docs, processed_set, chunk_size, chunk_overlap)
+
+    await asyncio.to_thread(vectorstore.add_documents, chunks_to_add)
@@ -6,6 +6,9 @@ from datetime import datetime
 from PyPDF2 import PdfReader
 from mcp_client import upload_file_via_mcp, save_metadata_via_mcp
 from langchain_core.tools import Tool
+from file_io import save_stream, read_text_file
+from loaders import FileLoader
+from database import init_documents_table
 
 # ---------------- Helpers ----------------
 def extract_text_from_pdf(file_path: str) -> str:
@@ -17,64 +20,77 @@ def init_db(db_path: str = "database.db"):
     """Initialize SQLite documents table if it doesn't exist."""
     conn = sqlite3.connect(db_path)
     cur = conn.cursor()
- 
 
+    init_documents_table(cur)
     cur.execute("""
-        CREATE TABLE IF NOT EXISTS documents (
+        CREATE TABLE IF NOT EXISTS upload_notes (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            content TEXT,
             filename TEXT,
-            path TEXT,
-            upload_date TEXT,
-            metadata TEXT
+            description TEXT,
+            created_at TEXT
         )
     """)
     conn.commit()
     conn.close()
 
-def save_to_db(filename: str, content: str, path: str, metadata: dict, db_path: str = "database.db"):
-    """Save document metadata and content to SQLite."""
+def save_to_db(filename: str, content: str | None, path: str, metadata: dict, db_path: str = "database.db"):
+    """Save document metadata (and optionally content) to SQLite."""
     conn = sqlite3.connect(db_path)
     cur = conn.cursor()
     cur.execute("""
-        INSERT INTO documents (filename, content, path, upload_date, metadata)
+        INSERT INTO documents (filename, content, filepath, upload_date, metadata)
         VALUES (?, ?, ?, ?, ?)
     """, (filename, content, path, datetime.now().isoformat(), json.dumps(metadata)))
     conn.commit()
     conn.close()
 
 # ---------------- Core Upload ----------------
-async def _upload_single_file(file, upload_dir: str, write_tool: Tool, sql_tool: Tool, db_path="database.db") -> dict:
+def extract_text(file_path: str) -> str:
+    """Extract text from an uploaded file on disk, by extension."""
+    ext = os.path.splitext(file_path)[1].lower()
+
+    if ext == ".pdf":
+        return extract_text_from_pdf(file_path)
+    if ext in (".docx", ".csv", ".xlsx"):
+        with open(file_path, "rb") as f:
+            return FileLoader().load(f, filename=file_path)
+    return read_text_file(file_path)
+
+async def _upload_single_file(file, upload_dir: str, write_tool: Tool | None, sql_tool: Tool | None, db_path="database.db") -> dict:
     """
     Upload a single file:
-    - Save locally
-    - Extract text
-    - Upload to MCP
+    - Stream to disk (hashing on the way)
+    - Extract text from the on-disk file
+    - Upload to MCP (when tools are given)
     - Save metadata to MCP and SQLite
+
+    Only the extracted text is ever held in memory as a whole.
+    Disk I/O and extraction run in a worker thread, off the event loop.
     """
     os.makedirs(upload_dir, exist_ok=True)
     file_path = os.path.join(upload_dir, file.name)
 
     # Save locally
-    with open(file_path, "wb") as f:
-        f.write(file.getvalue())
+    sha256, size = await asyncio.to_thread(save_stream, file, file_path)
+
+    metadata = {"uploaded_by": "user", "sha256": sha256, "size": size}
 
     # Extract content
     if file.type == "application/pdf":
-        content = extract_text_from_pdf(file_path)
+        content = await asyncio.to_thread(extract_text_from_pdf, file_path)
     else:
-        content = file.getvalue().decode("utf-8", errors="ignore")
+        content = await asyncio.to_thread(extract_text, file_path)
 
-    metadata = {"uploaded_by": "user"}
+    # Upload to MCP (the extracted text is the one in-memory copy)
+    if write_tool is not None:
+        await upload_file_via_mcp(write_tool, file.name, content)
+    if sql_tool is not None:
+        await save_metadata_via_mcp(sql_tool, file.name, "User uploaded")
 
-    # Upload to MCP
-    await upload_file_via_mcp(write_tool, file.name, content.encode("utf-8"))
-    await save_metadata_via_mcp(sql_tool, file.name, "User uploaded")
+    # Save to SQLite (content stays on disk; it is re-read from `filepath`)
+    await asyncio.to_thread(save_to_db, file.name, None, file_path, metadata, db_path)
 
-    # Save to SQLite
-    save_to_db(file.name, content, file_path, metadata, db_path=db_path)
-
-    return {"filename": file.name, "path": file_path, "content": content}
+    return {"filename": file.name, "path": file_path, "content": content, "sha256": sha256}
 
 # ---------------- Public Function ----------------
 def upload_files(uploaded_files, write_tool: Tool, sql_tool: Tool, upload_dir: str = "./uploads", db_path="database.db") -> list:
@@ -95,4 +111,37 @@ def upload_files(uploaded_files, write_tool: Tool, sql_tool: Tool, upload_dir: s
             docs.append(doc_info)
         return docs
 
-    return asyncio.get_event_loop().run_until_complete(_process_files())
+    # asyncio.run works from any thread (get_event_loop() fails off the main thread).
+    return asyncio.run(_process_files())
+
+# ---------------- Upload Service ----------------
+class FileUpload:
+    """
+    Upload service used by the Streamlit app, the HTTP API, the job queue
+    and rebuild_vectorstore.
+    MCP tools are optional: files already land in the folder / DB the MCP
+    servers read from.
+    """
+
+    def __init__(self, upload_dir: str, db_path: str, write_tool: Tool | None = None, sql_tool: Tool | None = None):
+        self.upload_dir = upload_dir
+        self.db_path = db_path
+        self.write_tool = write_tool
+        self.sql_tool = sql_tool
+
+        os.makedirs(upload_dir, exist_ok=True)
+        init_db(db_path)
+
+    async def aupload_files(self, uploaded_files) -> list:
+        """Upload files on the running event loop. Returns dicts with filename, path, content."""
+        docs = []
+        for file in uploaded_files:
+            docs.append(await _upload_single_file(file, self.upload_dir, self.write_tool, self.sql_tool, self.db_path))
+        return docs
+
+    def upload_files(self, uploaded_files) -> list:
+        """Blocking variant for sync callers (Streamlit script, worker threads)."""
+        return asyncio.run(self.aupload_files(uploaded_files))
+
+    def _extract_text(self, filepath: str) -> str:
+        return extract_text(filepath)
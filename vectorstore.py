@@ -1,54 +1,236 @@
+import os
 import uuid
-from typing import List
+import threading
+from typing import List, Tuple
 from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct
+from qdrant_client.models import (
+    VectorParams, Distance, PointStruct, Filter, FieldCondition, MatchAny, PayloadSchemaType, PointIdsList
+)
 from langchain_core.documents import Document
 from sentence_transformers import SentenceTransformer
+from dedup import LSHIndex, minhash_signature, lsh_bands, SIGNATURE_FIELD, BANDS_FIELD
 
 # ------------------------------
-# ✅ GLOBAL SINGLETON CLIENT
+# Qdrant backend config
 # ------------------------------
-_qdrant_client = None
+# QDRANT_MODE:
+#   embedded -> local on-disk storage (single process, dev only)
+#   memory   -> in-memory storage (tests / throwaway runs)
+#   server   -> Qdrant server over gRPC (shared by many app workers)
+QDRANT_MODE = os.getenv("QDRANT_MODE", "embedded")
+QDRANT_PATH = os.getenv("QDRANT_PATH", "qdrant_db")
+QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", "30"))
 
-class VectorStore:
-    def __init__(self, collection_name: str = "docs"):
-        global _qdrant_client
+UPSERT_BATCH_SIZE = int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", "256"))
+UPSERT_PARALLEL = int(os.getenv("QDRANT_UPSERT_PARALLEL", "4"))
+UPSERT_MAX_RETRIES = int(os.getenv("QDRANT_UPSERT_MAX_RETRIES", "3"))
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# How the collection's text was chunked, kept in the collection metadata
+# so snapshots (and later ingestion) can check it.
+SPLITTER = "RecursiveCharacterTextSplitter"
+
+# Near-duplicate chunks at ingest:
+#   skip -> drop them before embedding
+#   link -> drop them, but record their filename on the kept chunk
+#   off  -> store everything
+DEDUP_POLICY = os.getenv("DEDUP_POLICY", "link")
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+DUPLICATE_SOURCES_FIELD = "duplicate_sources"
+
+# ------------------------------
+# ✅ SHARED CLIENTS (one per backend)
+# ------------------------------
+# A client owns its gRPC channel / HTTP connection pool, so every
+# VectorStore in the process reuses the same one for a given backend.
+_qdrant_clients = {}
+
+
+def get_qdrant_client(mode: str = None, path: str = None, url: str = None) -> QdrantClient:
+    mode = mode or QDRANT_MODE
+
+    if mode == "embedded":
+        key = (mode, path or QDRANT_PATH)
+    elif mode == "memory":
+        key = (mode, None)
+    elif mode == "server":
+        key = (mode, url or QDRANT_URL)
+    else:
+        raise ValueError(f"Unknown QDRANT_MODE: {mode!r} (expected embedded, memory or server)")
+
+    if key not in _qdrant_clients:
+        if mode == "embedded":
+            client = QdrantClient(path=key[1])
+        elif mode == "memory":
+            client = QdrantClient(location=":memory:")
+        else:
+            client = QdrantClient(
+                url=key[1],
+                grpc_port=QDRANT_GRPC_PORT,
+                prefer_grpc=True,
+                api_key=QDRANT_API_KEY,
+                timeout=QDRANT_TIMEOUT,
+            )
+        _qdrant_clients[key] = client
+
+    return _qdrant_clients[key]
+
+
+# ------------------------------
+# Local band indexes (embedded / memory)
+# ------------------------------
+# Payload indexes are ignored by local Qdrant, so band lookups there would
+# scan the whole collection. Instead each collection's bands are loaded
+# once per process and kept up to date as points are added.
+_band_indexes = {}
+
+# Filenames in each collection, scrolled once per process and then kept
+# current by add_documents (every new session seeds from this).
+_indexed_filenames = {}
+
+_cache_lock = threading.Lock()
+
+
+def chunker_settings(client: QdrantClient, collection_name: str):
+    """Chunker settings recorded on a collection, or None if never recorded."""
+    metadata = client.get_collection(collection_name).config.metadata or {}
+    if "chunk_size" not in metadata:
+        return None
+    return {key: metadata.get(key) for key in ("splitter", "chunk_size", "chunk_overlap")}
+
+
+def _point_id(key: str):
+    # Index keys are str(point.id); Qdrant wants integer ids back as ints.
+    return int(key) if key.isdigit() else key
 
+
+def chunk_id(source: str, chunk_index: int) -> str:
+    """Stable point id for chunk `chunk_index` of `source`."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source}#{chunk_index}"))
+
+
+class VectorStore:
+    def __init__(
+        self,
+        collection_name: str = "docs",
+        mode: str = None,
+        path: str = None,
+        url: str = None,
+        dedup_policy: str = None,
+        dedup_threshold: float = None,
+    ):
         self.collection_name = collection_name
+        self.mode = mode or QDRANT_MODE
+
+        self.dedup_policy = dedup_policy or DEDUP_POLICY
+        if self.dedup_policy not in ("skip", "link", "off"):
+            raise ValueError(f"Unknown dedup policy: {self.dedup_policy!r} (expected skip, link or off)")
+        self.dedup_threshold = dedup_threshold or DEDUP_THRESHOLD
 
         # -------- Local embeddings (offline) --------
-        self.model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+        self.model_name = EMBEDDING_MODEL
+        self.model = SentenceTransformer(self.model_name)
         self.embedding_dim = self.model.get_sentence_embedding_dimension()
 
-        # -------- Local Qdrant (SINGLETON) --------
-        if _qdrant_client is None:
-            _qdrant_client = QdrantClient(path="qdrant_db")
-        self.client = _qdrant_client
+        # -------- Qdrant (shared client per backend) --------
+        self.client = get_qdrant_client(self.mode, path=path, url=url)
 
         # -------- Create collection if missing --------
         self._recreate_collection_once()
+        self._chunker_recorded = False
 
     # ------------------------------------------------
     # Create collection ONLY if not exists
     # ------------------------------------------------
     def _recreate_collection_once(self):
-        existing = [c.name for c in self.client.get_collections().collections]
-        if self.collection_name not in existing:
-            self.client.create_collection(
+        if not self.client.collection_exists(self.collection_name):
+            try:
+                self.client.create_collection(
+                    collection_name=self.collection_name,
+                    vectors_config=VectorParams(
+                        size=self.embedding_dim,
+                        distance=Distance.COSINE
+                    )
+                )
+            except Exception:
+                # Several workers starting against one server race here;
+                # losing to another worker's create is fine.
+                if not self.client.collection_exists(self.collection_name):
+                    raise
+
+        # Band lookups need an index on a server; local modes keep
+        # their own in-process index (see _local_band_index).
+        if self.dedup_policy != "off" and self.mode == "server":
+            self.client.create_payload_index(
                 collection_name=self.collection_name,
-                vectors_config=VectorParams(
-                    size=self.embedding_dim,
-                    distance=Distance.COSINE
+                field_name=BANDS_FIELD,
+                field_schema=PayloadSchemaType.KEYWORD
+            )
+
+        # is_indexed asks the server per file, so those lookups need indexes too.
+        if self.mode == "server":
+            for field in ("filename", DUPLICATE_SOURCES_FIELD):
+                self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field,
+                    field_schema=PayloadSchemaType.KEYWORD
                 )
+
+    # ------------------------------------------------
+    # Chunker settings (collection metadata)
+    # ------------------------------------------------
+    def record_chunker(self, chunk_size: int, chunk_overlap: int) -> None:
+        """
+        Record the chunker settings on the collection the first time, and
+        refuse to add text chunked differently afterwards.
+        """
+        if self._chunker_recorded:
+            return
+
+        expected = {"splitter": SPLITTER, "chunk_size": chunk_size, "chunk_overlap": chunk_overlap}
+        recorded = chunker_settings(self.client, self.collection_name)
+
+        if recorded is None:
+            self.client.update_collection(collection_name=self.collection_name, metadata=expected)
+        elif recorded != expected:
+            raise ValueError(
+                f"Collection {self.collection_name!r} was chunked with {recorded}, not {expected}. "
+                f"Use the same settings or index into a new collection."
             )
 
+        self._chunker_recorded = True
+
     # ------------------------------------------------
     # Add documents (BATCH EMBEDDING ✅)
     # ------------------------------------------------
-    def add_documents(self, documents: List[Document]) -> None:
+    def add_documents(self, documents: List[Document], ids: List[str] = None) -> None:
+        """
+        Embed and store documents.
+        Pass stable `ids` to make re-adding the same chunks an overwrite
+        instead of a duplicate (used by resumable ingestion).
+        """
         if not documents:
             return
 
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in documents]
+
+        # Count files as indexed even if all their chunks turn out to be duplicates.
+        with _cache_lock:
+            filenames = _indexed_filenames.get(self._cache_key())
+            if filenames is not None:
+                filenames.update(doc.metadata["filename"] for doc in documents if doc.metadata.get("filename"))
+
+        signatures = [None] * len(documents)
+        if self.dedup_policy != "off":
+            documents, ids, signatures = self._drop_near_duplicates(documents, ids)
+            if not documents:
+                return
+
         texts = [doc.page_content for doc in documents]
         metadatas = [doc.metadata for doc in documents]
 
@@ -56,50 +238,307 @@ class VectorStore:
         vectors = self.model.encode(texts, convert_to_numpy=True)
 
         points = []
-        for vector, text, metadata in zip(vectors, texts, metadatas):
+        for point_id, vector, text, metadata, signature in zip(ids, vectors, texts, metadatas, signatures):
+            payload = {
+                "content": text,
+                **{k: str(v) for k, v in metadata.items() if k != DUPLICATE_SOURCES_FIELD}
+            }
+            if DUPLICATE_SOURCES_FIELD in metadata:
+                payload[DUPLICATE_SOURCES_FIELD] = metadata[DUPLICATE_SOURCES_FIELD]
+            if signature is not None:
+                payload[SIGNATURE_FIELD] = signature.tolist()
+                payload[BANDS_FIELD] = lsh_bands(signature)
+
             points.append(
                 PointStruct(
-                    id=str(uuid.uuid4()),
+                    id=point_id,
                     vector=vector.tolist(),
-                    payload={
-                        "content": text,
-                        **{k: str(v) for k, v in metadata.items()}
-                    }
+                    payload=payload
                 )
             )
 
-        self.client.upsert(
+        self._upload(points)
+
+        band_index = self._local_band_index()
+        if band_index is not None:
+            for point_id, signature in zip(ids, signatures):
+                if signature is not None:
+                    band_index.add(str(point_id), signature)
+
+    # ------------------------------------------------
+    # Delete points (e.g. chunks of a file that was re-indexed)
+    # ------------------------------------------------
+    def delete_points(self, ids: List[str]) -> None:
+        if not ids:
+            return
+
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=PointIdsList(points=list(ids)),
+            wait=True
+        )
+
+        with _cache_lock:
+            band_index = _band_indexes.get(self._cache_key())
+            if band_index is not None:
+                for point_id in ids:
+                    band_index.remove(str(point_id))
+
+    # ------------------------------------------------
+    # Near-duplicate suppression (MinHash + LSH)
+    # ------------------------------------------------
+    def _drop_near_duplicates(self, documents, ids):
+        """
+        Filter out chunks that nearly match a stored chunk or an earlier
+        chunk of this batch, before they cost an embedding.
+        Returns the kept (documents, ids, signatures).
+        """
+        signatures = [minhash_signature(doc.page_content) for doc in documents]
+        bands = [lsh_bands(sig) for sig in signatures]
+
+        stored = self._local_band_index()
+        if stored is None:
+            stored = LSHIndex()
+            for point in self._stored_candidates({b for doc_bands in bands for b in doc_bands}):
+                payload = point.payload or {}
+                stored.add(str(point.id), payload[SIGNATURE_FIELD], payload[BANDS_FIELD])
+
+        batch = LSHIndex()
+        kept_docs, kept_ids, kept_sigs = [], [], []
+        kept_by_id = {}
+        links = {}
+
+        for doc, point_id, sig, doc_bands in zip(documents, ids, signatures, bands):
+            # Re-adding a chunk under its own stable id is an overwrite, not a duplicate.
+            match, sim = stored.best_match(sig, doc_bands, exclude=str(point_id))
+            batch_match, batch_sim = batch.best_match(sig, doc_bands)
+            if batch_sim > sim:
+                match, sim = batch_match, batch_sim
+
+            if match is None or sim < self.dedup_threshold:
+                batch.add(str(point_id), sig, doc_bands)
+                kept_by_id[str(point_id)] = doc
+                kept_docs.append(doc)
+                kept_ids.append(point_id)
+                kept_sigs.append(sig)
+                continue
+
+            if self.dedup_policy == "link":
+                filename = doc.metadata.get("filename")
+                if filename and match in kept_by_id:
+                    kept = kept_by_id[match].metadata
+                    # Repeated text inside one file is not another source.
+                    if filename != kept.get("filename"):
+                        sources = kept.setdefault(DUPLICATE_SOURCES_FIELD, [])
+                        if filename not in sources:
+                            sources.append(filename)
+                elif filename:
+                    links.setdefault(match, set()).add(filename)
+
+        stored = {}
+        if links:
+            for point in self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=[_point_id(key) for key in links],
+                with_payload=["filename", DUPLICATE_SOURCES_FIELD]
+            ):
+                stored[str(point.id)] = point.payload or {}
+
+        for key, filenames in links.items():
+            payload = stored.get(key, {})
+            sources = payload.get(DUPLICATE_SOURCES_FIELD, [])
+            new = sorted(filenames - set(sources) - {payload.get("filename")})
+            if not new:
+                continue
+            self.client.set_payload(
+                collection_name=self.collection_name,
+                payload={DUPLICATE_SOURCES_FIELD: sources + new},
+                points=[_point_id(key)]
+            )
+
+        dropped = len(documents) - len(kept_docs)
+        if dropped:
+            print(f"♻️ Skipped {dropped} near-duplicate chunk(s)")
+
+        return kept_docs, kept_ids, kept_sigs
+
+    def _cache_key(self):
+        return (id(self.client), self.collection_name)
+
+    def _local_band_index(self):
+        """Shared LSHIndex of the stored points (local modes only, loaded once)."""
+        if self.mode == "server" or self.dedup_policy == "off":
+            return None
+
+        key = self._cache_key()
+        with _cache_lock:
+            if key not in _band_indexes:
+                index = LSHIndex()
+                offset = None
+                while True:
+                    points, offset = self.client.scroll(
+                        collection_name=self.collection_name,
+                        limit=1000,
+                        offset=offset,
+                        with_payload=[SIGNATURE_FIELD, BANDS_FIELD],
+                        with_vectors=False
+                    )
+                    for point in points:
+                        payload = point.payload or {}
+                        if SIGNATURE_FIELD in payload:
+                            index.add(str(point.id), payload[SIGNATURE_FIELD], payload.get(BANDS_FIELD))
+                    if offset is None:
+                        break
+                _band_indexes[key] = index
+
+            return _band_indexes[key]
+
+    def _stored_candidates(self, bands, batch_size: int = 1000):
+        """Stored points sharing at least one LSH band with `bands`."""
+        bands = sorted(bands)
+        fields = [SIGNATURE_FIELD, BANDS_FIELD, DUPLICATE_SOURCES_FIELD]
+
+        for start in range(0, len(bands), batch_size):
+            band_filter = Filter(must=[
+                FieldCondition(key=BANDS_FIELD, match=MatchAny(any=bands[start:start + batch_size]))
+            ])
+            offset = None
+            while True:
+                points, offset = self.client.scroll(
+                    collection_name=self.collection_name,
+                    scroll_filter=band_filter,
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=fields,
+                    with_vectors=False
+                )
+                yield from points
+                if offset is None:
+                    break
+
+    # ------------------------------------------------
+    # Batched upload (parallel + retry on server)
+    # ------------------------------------------------
+    def _upload(self, points: List[PointStruct]) -> None:
+        # Local storage is single-process, so parallel uploads only
+        # make sense against a server, and a worker pool only pays off
+        # when there is more than one batch to spread across it.
+        parallel = UPSERT_PARALLEL if self.mode == "server" and len(points) > UPSERT_BATCH_SIZE else 1
+
+        self.client.upload_points(
             collection_name=self.collection_name,
-            points=points
+            points=points,
+            batch_size=UPSERT_BATCH_SIZE,
+            parallel=parallel,
+            max_retries=UPSERT_MAX_RETRIES,
+            wait=True,
         )
 
     # ------------------------------------------------
     # Similarity search
     # ------------------------------------------------
-    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, score_threshold: float = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        Top-`k` hits as (Document, cosine score), best first.
+        `score_threshold` drops weaker hits on the Qdrant side.
+        The score is also kept in `metadata["score"]`.
+        """
         query_vector = self.model.encode([query], convert_to_numpy=True)[0]
 
         results = self.client.query_points(
             collection_name=self.collection_name,
             query=query_vector,
-            limit=k
+            limit=k,
+            score_threshold=score_threshold
         )
 
-        documents = []
+        hits = []
         for hit in results.points:
             payload = hit.payload or {}
-            documents.append(
-                Document(
-                    page_content=payload.get("content", ""),
-                    metadata={key: value for key, value in payload.items() if key != "content"}
-                )
+            metadata = {
+                key: value for key, value in payload.items()
+                if key not in ("content", SIGNATURE_FIELD, BANDS_FIELD)
+            }
+            metadata["score"] = hit.score
+            hits.append((Document(page_content=payload.get("content", ""), metadata=metadata), hit.score))
+
+        return hits
+
+    def similarity_search(self, query: str, k: int = 4, score_threshold: float = None) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, score_threshold)]
+
+    # ------------------------------------------------
+    # Filenames already in the index
+    # ------------------------------------------------
+    def indexed_filenames(self, batch_size: int = 1000) -> set:
+        """
+        Every file with content in the index, including files whose chunks
+        were all dropped as near-duplicates and only linked.
+        The collection is scrolled once per process; later calls are a copy.
+        In server mode other workers add files too, so a name missing here
+        is not proof it isn't indexed: check it with is_indexed.
+        """
+        key = self._cache_key()
+        with _cache_lock:
+            if key not in _indexed_filenames:
+                _indexed_filenames[key] = self._scroll_filenames(batch_size)
+            return set(_indexed_filenames[key])
+
+    def is_indexed(self, filename: str) -> bool:
+        """
+        Whether `filename` has content in the index. Local storage belongs to
+        this process alone, so the cached set is the truth there; a server
+        is asked directly (and the cache updated).
+        """
+        if filename in self.indexed_filenames():
+            return True
+        if self.mode != "server":
+            return False
+
+        count = self.client.count(
+            collection_name=self.collection_name,
+            count_filter=Filter(should=[
+                FieldCondition(key="filename", match=MatchAny(any=[filename])),
+                FieldCondition(key=DUPLICATE_SOURCES_FIELD, match=MatchAny(any=[filename])),
+            ]),
+            exact=True
+        ).count
+        if not count:
+            return False
+
+        with _cache_lock:
+            _indexed_filenames.setdefault(self._cache_key(), set()).add(filename)
+        return True
+
+    def _scroll_filenames(self, batch_size: int) -> set:
+        filenames = set()
+        offset = None
+
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=["filename", DUPLICATE_SOURCES_FIELD],
+                with_vectors=False
             )
+            for point in points:
+                payload = point.payload or {}
+                filename = payload.get("filename")
+                if filename:
+                    filenames.add(filename)
+                filenames.update(payload.get(DUPLICATE_SOURCES_FIELD) or [])
 
-        return documents
+            if offset is None:
+                return filenames
 
     # ------------------------------------------------
     # Optional: Clear collection manually
     # ------------------------------------------------
     def clear_collection(self):
         self.client.delete_collection(self.collection_name)
-
+        with _cache_lock:
+            _band_indexes.pop(self._cache_key(), None)
+            _indexed_filenames.pop(self._cache_key(), None)